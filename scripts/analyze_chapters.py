@@ -7,10 +7,19 @@ import asyncio
 import sys
 import os
 import json
+import hashlib
+import random
+import math
+import time
+import re
+from dataclasses import dataclass
 from pathlib import Path
+from string import Template
 import httpx
-from typing import Dict, Any, Optional
-from datetime import datetime
+import orjson
+from pymongo.errors import BulkWriteError
+from typing import Dict, Any, Optional, List, Tuple
+from datetime import datetime, timezone
 
 # Add src to path so we can import our modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
@@ -20,9 +29,12 @@ from novel_companion.models.mongodb_connection import (
     connect_to_mongodb,
     disconnect_from_mongodb,
     get_novel_by_title,
+    get_cached_llm_analysis,
+    cache_llm_analysis,
 )
 from novel_companion.models.mongodb_models import Chapter
 from novel_companion.models.mongodb_operations import ChapterOperations
+from novel_companion.api.schemas import normalize_analysis_data
 
 # --- Configuration ---
 NOVEL_TITLE_TO_PROCESS = "Omniscient Reader's Viewpoint"
@@ -31,14 +43,146 @@ PROMPT_TEMPLATE_PATH = Path("prompt_template.txt")
 OPENROUTER_API_KEY = settings.openrouter_api_key
 OPENROUTER_API_URL = f"{settings.openrouter_base_url}/chat/completions"
 LLM_MODEL = settings.deepseek_model
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_TARGET_LATENCY = float(os.getenv("LLM_TARGET_LATENCY", "30"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "4096"))
+LLM_TEMPERATURE = 0.2 # Low temperature keeps the structured JSON output stable
+LLM_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+MAX_RETRIES = 5
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+CHAPTER_BATCH_SIZE = 100 # Analyzed chapters are inserted into MongoDB in batches of this size
+N_BUILDERS = 2 # Tasks reading chapter files and assembling prompts
+BUILD_QUEUE_SIZE = 64 # Prepared prompts waiting for an LLM worker (bounds chapter texts held in memory)
+WRITE_QUEUE_SIZE = 256 # Analyzed chapters waiting for the writer
+
+CHAPTER_NUMBER_RE = re.compile(r"^(?:chapter|ch)[_\-]?0*(\d+)$", re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+JSON_DECODER = json.JSONDecoder()
+json_loads = orjson.loads
+
+def json_dumps(data: Any) -> bytes:
+    """Serializes a request body straight to UTF-8 bytes."""
+    return orjson.dumps(data)
+
+class AdmissionController:
+    """AIMD concurrency limit for LLM calls: grows while responses are fast, halves on errors or slowdowns."""
+
+    def __init__(self, initial: int, c_min: int = 1, c_max: int = 32, target_latency: float = 30.0,
+                 alpha: float = 0.5, beta: float = 0.5):
+        self.c = float(initial)
+        self.c_min = c_min
+        self.c_max = c_max
+        self.target_latency = target_latency
+        self.alpha = alpha
+        self.beta = beta
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Waits until fewer than the current limit of requests are in flight."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.c))
+            self.in_flight += 1
+
+    async def release(self, latency: float, err: bool) -> None:
+        """Frees a slot, feeds the outcome into the AIMD rule and wakes up waiters."""
+        async with self._cond:
+            self.in_flight -= 1
+            self.observe(latency, err)
+            self._cond.notify_all()
+
+    def observe(self, latency: float, err: bool) -> None:
+        """Additively increases concurrency on healthy responses, multiplicatively decreases otherwise."""
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+        if err or self.avg_latency > self.target_latency:
+            self.c = max(self.c_min, self.c * self.beta)
+        else:
+            self.c = min(self.c_max, self.c + self.alpha)
+
+# Adapts how many LLM calls are in flight at once, starting from LLM_CONCURRENCY
+ADMISSION = AdmissionController(LLM_CONCURRENCY, c_max=LLM_MAX_CONCURRENCY, target_latency=LLM_TARGET_LATENCY)
+
+class RateLimitState:
+    """Tracks OpenRouter's rate-limit headers and pauses new requests when quota runs low."""
+    reset_at: float = 0
+    remaining: float = math.inf
+    _ok = asyncio.Event()
+    _ok.set()
+
+    @classmethod
+    async def wait(cls) -> None:
+        """Blocks until the current rate-limit window has capacity again."""
+        await cls._ok.wait()
+
+    @classmethod
+    def update(cls, response: httpx.Response) -> None:
+        """Reads the rate-limit headers of a response and pauses if we're near the limit."""
+        headers = response.headers
+        try:
+            cls.remaining = int(headers.get("x-ratelimit-remaining-requests", "1000"))
+            limit = int(headers.get("x-ratelimit-limit-requests", "0"))
+            reset_delta = float(headers.get("x-ratelimit-reset-requests", "0").rstrip("s"))
+        except ValueError:
+            return
+        if response.status_code == 429:
+            reset_delta = max(reset_delta, get_retry_delay(0, response))
+        elif cls.remaining > max(2, 0.1 * limit):
+            return
+        if reset_delta <= 0 or not cls._ok.is_set():
+            return
+        loop = asyncio.get_running_loop()
+        cls.reset_at = loop.time() + reset_delta
+        cls._ok.clear()
+        loop.call_later(reset_delta, cls._ok.set)
+        print(f"   🚦 Rate limit nearly exhausted ({cls.remaining} left), pausing new requests for {reset_delta:.1f}s...")
 
 # --- Helper Functions ---
 
-def load_prompt_template() -> str:
-    """Loads the prompt template from the specified file."""
+class ChapterFlusher:
+    """Buffers analyzed chapters and inserts them into MongoDB in batches."""
+
+    def __init__(self, failed: List[Tuple[int, str]], batch_size: int = CHAPTER_BATCH_SIZE):
+        self.failed = failed
+        self.batch_size = batch_size
+        self.buf: List[Chapter] = []
+
+    async def add(self, chapter: Chapter) -> None:
+        """Queues a chapter, flushing once a full batch has accumulated."""
+        self.buf.append(chapter)
+        if len(self.buf) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Inserts all buffered chapters; unordered so one bad document doesn't abort the batch."""
+        if not self.buf:
+            return
+        # Swap the buffer out before awaiting so concurrent adds start a new batch
+        batch, self.buf = self.buf, []
+        try:
+            await Chapter.insert_many(batch, ordered=False)
+            print(f"   💾 Stored {len(batch)} analyzed chapters in MongoDB.")
+        except BulkWriteError as e:
+            details = e.details or {}
+            write_errors = details.get("writeErrors", [])
+            print(f"❌ Stored {details.get('nInserted', 0)} of {len(batch)} chapters; {len(write_errors)} failed.")
+            for write_error in write_errors:
+                self.failed.append((batch[write_error["index"]].chapter_number, write_error.get("errmsg", "write error")))
+        except Exception as e:
+            print(f"❌ Error storing {len(batch)} chapters in MongoDB: {e}")
+            self.failed.extend((chapter.chapter_number, repr(e)) for chapter in batch)
+
+async def load_prompt_template() -> Template:
+    """Loads the prompt template from the specified file, compiling its {{placeholders}}."""
     try:
-        with open(PROMPT_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
-            return f.read()
+        raw = await asyncio.to_thread(PROMPT_TEMPLATE_PATH.read_text, encoding='utf-8')
+        # Escape literal $ first, then turn {{name}} into ${name} so each chapter fills it in one pass
+        return Template(PLACEHOLDER_RE.sub(r"${\1}", raw.replace("$", "$$")))
     except FileNotFoundError:
         print(f"❌ Error: Prompt template file not found at {PROMPT_TEMPLATE_PATH}")
         sys.exit(1)
@@ -47,16 +191,86 @@ def load_prompt_template() -> str:
         sys.exit(1)
 
 def extract_chapter_number_from_filename(filename: str) -> Optional[int]:
-    """Extracts chapter number from filename like ch1.md, chapter_01.txt etc."""
-    name_part = Path(filename).stem
-    parts = name_part.replace('_', '').replace('-', '').lower()
-    if parts.startswith("ch"):
-        num_str = parts[2:]
-        if num_str.isdigit():
-            return int(num_str)
-    return None
-
-async def get_llm_analysis(prompt: str) -> Optional[Dict[str, Any]]:
+    """Extracts chapter number from filename like ch1.md, chapter_01.txt, chapter-01.md etc."""
+    match = CHAPTER_NUMBER_RE.match(Path(filename).stem)
+    return int(match.group(1)) if match else None
+
+def get_retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Exponential backoff with jitter, deferring to the server's Retry-After when present."""
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after", 0))
+        except ValueError:
+            retry_after = 0
+        if retry_after > 0:
+            return retry_after
+    return min(60, (2 ** attempt) + random.random())
+
+async def read_sse_content(response: httpx.Response) -> str:
+    """Reassembles the delta.content chunks of a streamed (SSE) OpenRouter completion."""
+    parts: List[str] = []
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue  # Blank separators and ": OPENROUTER PROCESSING" keep-alive comments
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            break
+        chunk = json_loads(payload)
+        if chunk.get("error"):
+            raise ValueError(f"LLM stream error: {chunk['error']}")
+        for choice in chunk.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                parts.append(content)
+    return "".join(parts)
+
+async def stream_with_retries(client: httpx.AsyncClient, headers: Dict[str, str], data: Dict[str, Any]) -> str:
+    """Streams a completion from OpenRouter, retrying rate limits and server errors up to MAX_RETRIES times."""
+    body = json_dumps(data) # Encoded once and reused across retries
+    for attempt in range(MAX_RETRIES):
+        try:
+            await RateLimitState.wait()
+            await ADMISSION.acquire()
+            t_start = time.monotonic()
+            err = True
+            try:
+                async with client.stream("POST", OPENROUTER_API_URL, headers=headers, content=body, timeout=LLM_TIMEOUT) as response:
+                    RateLimitState.update(response)
+                    if response.is_error:
+                        err = response.status_code in RETRYABLE_STATUS_CODES
+                        await response.aread()  # Load the error body so callers can report it
+                        response.raise_for_status()
+                    content = await read_sse_content(response)
+                    err = False
+            finally:
+                await ADMISSION.release(time.monotonic() - t_start, err)
+            return content
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in RETRYABLE_STATUS_CODES or attempt == MAX_RETRIES - 1:
+                raise
+            delay = get_retry_delay(attempt, e.response)
+            print(f"   ⏳ LLM returned {e.response.status_code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})...")
+        except httpx.RequestError as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            delay = get_retry_delay(attempt)
+            print(f"   ⏳ LLM request failed ({e}), retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})...")
+        await asyncio.sleep(delay)
+
+def parse_llm_json(content_str: str) -> Dict[str, Any]:
+    """Parses the first JSON object in an LLM reply, ignoring markdown fences and trailing text."""
+    text = CODE_FENCE_RE.sub("", content_str.strip())
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass  # Embedded in prose or followed by extra text; fall back to raw_decode
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    obj, _end = JSON_DECODER.raw_decode(text, start)
+    return obj
+
+async def get_llm_analysis(client: httpx.AsyncClient, prompt: str) -> Optional[Dict[str, Any]]:
     """Sends a prompt to the OpenRouter API and returns the JSON response."""
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
@@ -65,115 +279,56 @@ async def get_llm_analysis(prompt: str) -> Optional[Dict[str, Any]]:
     data = {
         "model": LLM_MODEL,
         "messages": [{"role": "user", "content": prompt}],
-        "response_format": {"type": "json_object"} # Request JSON output
+        "response_format": {"type": "json_object"}, # Request JSON output
+        "max_tokens": LLM_MAX_TOKENS,
+        "temperature": LLM_TEMPERATURE,
+        "stream": True # Receive the reply incrementally as server-sent events
     }
 
-    async with httpx.AsyncClient(timeout=120.0) as client: # Increased timeout
-        try:
-            print(f"   Sending request to LLM for analysis (model: {LLM_MODEL})...")
-            response = await client.post(OPENROUTER_API_URL, headers=headers, json=data)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            
-            response_json = response.json()
-            
-            if response_json.get("choices") and response_json["choices"][0].get("message"):
-                content_str = response_json["choices"][0]["message"].get("content")
-                if content_str:
-                    json_substring = None
-                    try:
-                        # Priority 1: Look for a markdown ```json ... ``` block
-                        if content_str.strip().startswith("```json"):
-                            start_marker = content_str.find("```json") + 7 # Length of "```json\n"
-                            end_marker = content_str.rfind("```")
-                            if start_marker != -1 and end_marker != -1 and start_marker < end_marker:
-                                json_substring = content_str[start_marker:end_marker].strip()
-                                # Try parsing this first specific block
-                                analysis_json = json.loads(json_substring)
-                                return analysis_json 
-                        
-                        # Priority 2: If no clear markdown, try to find the first complete JSON object
-                        # This handles cases where the JSON might be embedded or followed by other text.
-                        json_start_index = content_str.find('{')
-                        if json_start_index != -1:
-                            # Try to find the matching closing brace for the first opening brace
-                            open_braces = 0
-                            json_end_index = -1
-                            for i in range(json_start_index, len(content_str)):
-                                if content_str[i] == '{':
-                                    open_braces += 1
-                                elif content_str[i] == '}':
-                                    open_braces -= 1
-                                    if open_braces == 0:
-                                        json_end_index = i
-                                        break
-                            
-                            if json_end_index != -1:
-                                json_substring = content_str[json_start_index : json_end_index + 1]
-                                analysis_json = json.loads(json_substring)
-                                return analysis_json
-
-                        # Fallback: If the above fail, use the previous broader extraction (less reliable for mixed content)
-                        # This part is less likely to be reached if the above are effective
-                        if json_substring is None: # only if not set by markdown block logic
-                            json_start_index = content_str.find('{')
-                            json_end_index = content_str.rfind('}')
-                            if json_start_index != -1 and json_end_index != -1 and json_start_index < json_end_index:
-                                json_substring = content_str[json_start_index : json_end_index + 1]
-                            else: # Last resort, assume content_str itself might be the JSON (after simple stripping)
-                                temp_str = content_str.strip()
-                                if temp_str.startswith("```json"):
-                                    temp_str = temp_str[7:]
-                                if temp_str.startswith("```"):
-                                    temp_str = temp_str[3:]
-                                if temp_str.endswith("```"):
-                                    temp_str = temp_str[:-3]
-                                json_substring = temp_str.strip()
-                        
-                        analysis_json = json.loads(json_substring) # Try parsing the derived substring
-                        return analysis_json
-
-                    except json.JSONDecodeError as e:
-                        error_context = json_substring if json_substring is not None else content_str
-                        print(f"❌ Error decoding JSON from LLM response content: {e}")
-                        print(f"LLM Raw Content (or attempted part):\n{error_context[:1000]}...")
-                        return None
-                else:
-                    print("❌ LLM response content is empty.")
-                    return None
-            else:
-                print(f"❌ Unexpected LLM response structure: {response_json}")
+    try:
+        print(f"   Sending request to LLM for analysis (model: {LLM_MODEL})...")
+        content_str = await stream_with_retries(client, headers, data)
+        if content_str:
+            try:
+                return parse_llm_json(content_str)
+            except json.JSONDecodeError as e:
+                print(f"❌ Error decoding JSON from LLM response content: {e}")
+                print(f"LLM Raw Content (or attempted part):\n{content_str[:1000]}...")
                 return None
-        except httpx.HTTPStatusError as e:
-            print(f"❌ HTTP error occurred: {e.response.status_code} - {e.response.text}")
-            return None
-        except httpx.RequestError as e:
-            print(f"❌ Request error occurred: {e}")
-            return None
-        except Exception as e:
-            print(f"❌ An unexpected error occurred during LLM call: {e}")
+        else:
+            print("❌ LLM response content is empty.")
             return None
+    except httpx.HTTPStatusError as e:
+        print(f"❌ HTTP error occurred: {e.response.status_code} - {e.response.text}")
+        return None
+    except httpx.RequestError as e:
+        print(f"❌ Request error occurred: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ An unexpected error occurred during LLM call: {e}")
+        return None
 
 def populate_main_fields_from_analysis(chapter: Chapter, analysis: Dict[str, Any]):
     """Populates main chapter fields from the detailed analysis_data."""
     try:
-        chapter_analysis_data = analysis.get("chapter_analysis", {})
+        chapter_analysis_data = analysis.get("chapter_analysis") or {}
         
         # Summary
-        summary_data = chapter_analysis_data.get("summary", {})
+        summary_data = chapter_analysis_data.get("summary") or {}
         chapter.summary = summary_data.get("concise") or summary_data.get("detailed")
-        chapter.key_events = summary_data.get("key_events", [])
+        chapter.key_events = summary_data.get("key_events") or []
 
         # Characters Mentioned (from character_mapping)
-        character_mapping_data = analysis.get("character_mapping", {})
-        characters_list = character_mapping_data.get("characters", [])
-        chapter.characters_mentioned = [char.get("name") for char in characters_list if char.get("name")]
+        character_mapping_data = analysis.get("character_mapping") or {}
+        characters_list = character_mapping_data.get("characters") or []
+        chapter.characters_mentioned = list(filter(None, (char.get("name") for char in characters_list)))
 
         # Themes
-        themes_data = chapter_analysis_data.get("themes", [])
-        chapter.themes = [theme.get("theme") for theme in themes_data if theme.get("theme")]
+        themes_data = chapter_analysis_data.get("themes") or []
+        chapter.themes = list(filter(None, (theme.get("theme") for theme in themes_data)))
         
         # Sentiment Score (simplified - can be made more sophisticated)
-        sentiment_analysis = chapter_analysis_data.get("sentiment_analysis", {})
+        sentiment_analysis = chapter_analysis_data.get("sentiment_analysis") or {}
         if sentiment_analysis.get("emotional_arc"):
             # Example: average intensity of dominant emotions, or a specific metric
             # For now, let's see if we can get an overall score or a primary emotion's intensity
@@ -187,19 +342,32 @@ def populate_main_fields_from_analysis(chapter: Chapter, analysis: Dict[str, Any
         print(f"⚠️ Warning: Could not populate all main fields from analysis for chapter {chapter.title}: {e}")
 
 
-async def analyze_and_store_chapter(
+@dataclass
+class ChapterJob:
+    """A chapter read from disk with its prompt assembled, ready for the LLM stage."""
+    chapter_number: int
+    title: str
+    content: str
+    word_count: int
+    reading_time: int
+    prompt: str
+    cache_key: str
+
+
+def build_chapter_job(
     novel_id_str: str,
     chapter_number: int,
     chapter_title_prefix: str,
     chapter_content: str,
-    prompt_template: str,
+    prompt_template: Template,
     novel_title: str
-):
-    """Analyzes a single chapter and stores it in MongoDB."""
+) -> ChapterJob:
+    """Assembles the LLM prompt for a single chapter (pure CPU, no I/O)."""
     print(f"📄 Processing Chapter {chapter_number}: {chapter_title_prefix}...")
 
     word_count = len(chapter_content.split())
     estimated_reading_time = max(1, word_count // 200) # Assuming 200 WPM
+    chapter_title = f"{chapter_title_prefix} - Chapter {chapter_number}" # Consistent title
 
     # Prepare the prompt
     # Placeholders: {{novel_id}}, {{chapter_id}} (will be generated by DB),
@@ -208,16 +376,16 @@ async def analyze_and_store_chapter(
     # The main content of the chapter needs to be inserted into the prompt.
     # The template expects a JSON output, so we ask the LLM to fill that structure.
 
-    filled_prompt = prompt_template.replace("{{novel_id}}", novel_id_str)
-    # chapter_id is generated by MongoDB, so we might not have it for the prompt.
-    # We can tell the LLM to leave it as a placeholder or omit it from the prompt if it's only for DB record.
-    # Let's assume for now the LLM can handle {{chapter_id}} as a placeholder or we remove it from the prompt if not needed.
-    filled_prompt = filled_prompt.replace("{{chapter_id}}", "GENERATED_BY_DB") # Or an empty string
-    filled_prompt = filled_prompt.replace("{{novel_title}}", novel_title)
-    filled_prompt = filled_prompt.replace("{{chapter_number}}", str(chapter_number))
-    filled_prompt = filled_prompt.replace("{{chapter_title}}", f"{chapter_title_prefix} - Chapter {chapter_number}")
-    filled_prompt = filled_prompt.replace("{{word_count}}", str(word_count))
-    filled_prompt = filled_prompt.replace("{{reading_time}}", str(estimated_reading_time))
+    # chapter_id is generated by MongoDB, so the LLM just sees a placeholder value for it.
+    filled_prompt = prompt_template.safe_substitute(
+        novel_id=novel_id_str,
+        chapter_id="GENERATED_BY_DB",
+        novel_title=novel_title,
+        chapter_number=chapter_number,
+        chapter_title=chapter_title,
+        word_count=word_count,
+        reading_time=estimated_reading_time
+    )
     
     # The crucial part: inserting the chapter content.
     # The prompt template should have a clear section where the chapter text goes.
@@ -225,39 +393,100 @@ async def analyze_and_store_chapter(
     # We'll prepend the chapter content before the JSON structure request.
     final_prompt = f"Novel Chapter Text:\n\n{chapter_content}\n\n---END OF CHAPTER TEXT---\n\nAnalyze the above chapter and provide the output in the following JSON format. Ensure the entire output is a single valid JSON object as specified in the schema provided in the initial prompt template instructions:\n\n{filled_prompt}"
 
-
     print(f"   Prompt prepared. Word count: {word_count}.")
 
-    analysis_json = await get_llm_analysis(final_prompt)
+    return ChapterJob(
+        chapter_number=chapter_number,
+        title=chapter_title,
+        content=chapter_content,
+        word_count=word_count,
+        reading_time=estimated_reading_time,
+        prompt=final_prompt,
+        # Identical chapter text analyzed by the same model never needs a second LLM call
+        cache_key=hashlib.sha256(f"{LLM_MODEL}\n".encode() + chapter_content.encode()).hexdigest()
+    )
+
+
+async def analyze_chapter(client: httpx.AsyncClient, novel_id_str: str, job: ChapterJob) -> Chapter:
+    """Gets the LLM analysis for a prepared chapter (cached if possible) and builds its document."""
+    chapter_number = job.chapter_number
+    analysis_json = await get_cached_llm_analysis(job.cache_key)
 
-    if not analysis_json:
-        print(f"❌ Failed to get LLM analysis for Chapter {chapter_number}. Skipping.")
-        return
+    if analysis_json:
+        print(f"   ♻️ Reusing cached LLM analysis for Chapter {chapter_number}.")
+    else:
+        analysis_json = await get_llm_analysis(client, job.prompt)
 
-    print(f"   ✅ LLM analysis received for Chapter {chapter_number}.")
+        if not analysis_json:
+            raise RuntimeError(f"Failed to get LLM analysis for Chapter {chapter_number}")
+
+        print(f"   ✅ LLM analysis received for Chapter {chapter_number}.")
+        try:
+            await cache_llm_analysis(job.cache_key, analysis_json)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not cache LLM analysis for Chapter {chapter_number}: {e}")
+    
+    # Validate once here so API reads can skip validation
+    normalized_analysis = normalize_analysis_data(analysis_json)
     
     # Create Chapter document
     chapter_data = {
         "novel_id": novel_id_str,
-        "title": f"{chapter_title_prefix} - Chapter {chapter_number}", # Consistent title
+        "title": job.title,
         "chapter_number": chapter_number,
-        "content": chapter_content,
-        "word_count": word_count,
-        "reading_time_minutes": estimated_reading_time,
-        "analysis_data": analysis_json, # Store the full analysis
+        "content": job.content,
+        "word_count": job.word_count,
+        "reading_time_minutes": job.reading_time,
+        "analysis_data": normalized_analysis or analysis_json, # Store the full analysis
+        "analysis_data_validated": normalized_analysis is not None,
         "is_processed": True,
-        "processing_timestamp": datetime.utcnow()
+        "processing_timestamp": datetime.now(timezone.utc)
     }
     
     new_chapter = Chapter(**chapter_data)
     populate_main_fields_from_analysis(new_chapter, analysis_json)
-    
-    try:
-        await ChapterOperations.create_chapter(new_chapter.model_dump(by_alias=True))
-        print(f"   💾 Successfully stored Chapter {chapter_number} ({new_chapter.title}) with analysis in MongoDB.")
-    except Exception as e:
-        print(f"❌ Error storing Chapter {chapter_number} in MongoDB: {e}")
+    return new_chapter
+
 
+# --- Pipeline stages: builder -> llm worker -> writer, connected by queues ---
+# A None sentinel on a queue tells one consumer of that stage to shut down.
+
+async def chapter_builder(
+    files_q: asyncio.Queue,
+    build_q: asyncio.Queue,
+    failed: List[Tuple[int, str]],
+    **job_kwargs
+):
+    """Reads chapter files and assembles their prompts for the LLM workers."""
+    while (item := await files_q.get()) is not None:
+        chapter_file, chapter_number = item
+        try:
+            content = await asyncio.to_thread(chapter_file.read_text, encoding='utf-8')
+            await build_q.put(build_chapter_job(chapter_number=chapter_number, chapter_content=content, **job_kwargs))
+        except Exception as e:
+            failed.append((chapter_number, repr(e)))
+
+async def llm_worker(
+    client: httpx.AsyncClient,
+    novel_id_str: str,
+    build_q: asyncio.Queue,
+    write_q: asyncio.Queue,
+    failed: List[Tuple[int, str]]
+):
+    """Analyzes prepared chapters; ADMISSION bounds how many LLM calls are actually in flight."""
+    while (job := await build_q.get()) is not None:
+        try:
+            new_chapter = await analyze_chapter(client, novel_id_str, job)
+            await write_q.put(new_chapter)
+            print(f"   📥 Chapter {job.chapter_number} ({new_chapter.title}) analyzed and queued for storage.")
+        except Exception as e:
+            failed.append((job.chapter_number, repr(e)))
+
+async def chapter_writer(write_q: asyncio.Queue, flusher: ChapterFlusher):
+    """Hands analyzed chapters to the batching flusher as they arrive."""
+    while (chapter := await write_q.get()) is not None:
+        await flusher.add(chapter)
+    await flusher.flush()
 
 async def main():
     """Main function to orchestrate chapter analysis and storage."""
@@ -267,9 +496,13 @@ async def main():
         print("❌ Error: OPENROUTER_API_KEY is not set in environment or config.")
         sys.exit(1)
 
-    prompt_template_content = load_prompt_template()
+    prompt_template_content = await load_prompt_template()
 
     await connect_to_mongodb()
+    # Dead-letter list of (chapter_number, error) so one bad chapter never stops the batch
+    failed: List[Tuple[int, str]] = []
+    flusher = ChapterFlusher(failed)
+    novel = None
 
     try:
         novel = await get_novel_by_title(NOVEL_TITLE_TO_PROCESS)
@@ -295,42 +528,88 @@ async def main():
 
         print(f"📚 Found {len(chapter_files)} chapter files to process.")
 
+        numbered_files = []
         for chapter_file in chapter_files:
             chapter_num_from_filename = extract_chapter_number_from_filename(chapter_file.name)
             if chapter_num_from_filename is None:
                 print(f"⚠️ Skipping file {chapter_file.name}, could not determine chapter number.")
                 continue
-            
-            # Check if chapter already processed and analyzed
-            existing_chapter = await ChapterOperations.get_chapter_by_number(novel_id_str, chapter_num_from_filename)
-            if existing_chapter and existing_chapter.is_processed and existing_chapter.analysis_data:
-                print(f"ℹ️ Chapter {chapter_num_from_filename} ({existing_chapter.title}) already analyzed. Skipping.")
-                continue
+            numbered_files.append((chapter_file, chapter_num_from_filename))
+
+        # Check which chapters are already analyzed, and which are stored at all (an index-only
+        # read): re-inserting a stored chapter would hit the unique index after its LLM call
+        chapter_nums = [chapter_num for _, chapter_num in numbered_files]
+        processed, stored = await asyncio.gather(
+            ChapterOperations.get_processed_numbers(novel_id_str, chapter_nums),
+            ChapterOperations.get_stored_numbers(novel_id_str, chapter_nums)
+        )
 
-            try:
-                with open(chapter_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                chapter_title_prefix = novel.title # Use novel title as prefix for chapter title
-                
-                await analyze_and_store_chapter(
+        # One pooled client for every LLM call so connections are kept alive and reused
+        async with httpx.AsyncClient(
+            timeout=LLM_TIMEOUT,
+            # An explicit transport ignores client-level limits, so the pool is sized here
+            transport=httpx.AsyncHTTPTransport(
+                retries=2, # Transparently retries failed connects
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+        ) as client:
+            files_q: asyncio.Queue = asyncio.Queue()
+            build_q: asyncio.Queue = asyncio.Queue(BUILD_QUEUE_SIZE)
+            write_q: asyncio.Queue = asyncio.Queue(WRITE_QUEUE_SIZE)
+
+            pending = 0
+            for chapter_file, chapter_num_from_filename in numbered_files:
+                if chapter_num_from_filename in processed:
+                    print(f"ℹ️ Chapter {chapter_num_from_filename} already analyzed. Skipping.")
+                    continue
+                if chapter_num_from_filename in stored:
+                    print(f"ℹ️ Chapter {chapter_num_from_filename} already stored without analysis. Skipping.")
+                    continue
+                files_q.put_nowait((chapter_file, chapter_num_from_filename))
+                pending += 1
+
+            print(f"⚙️ Analyzing {pending} chapters starting at {LLM_CONCURRENCY} concurrent LLM calls (max {LLM_MAX_CONCURRENCY})...")
+            builders = [
+                asyncio.create_task(chapter_builder(
+                    files_q,
+                    build_q,
+                    failed,
                     novel_id_str=novel_id_str,
-                    chapter_number=chapter_num_from_filename,
-                    chapter_title_prefix=chapter_title_prefix,
-                    chapter_content=content,
+                    chapter_title_prefix=novel.title, # Use novel title as prefix for chapter title
                     prompt_template=prompt_template_content,
                     novel_title=novel.title
-                )
-                print("-" * 30) # Separator for chapters
-            except Exception as e:
-                print(f"❌ Error processing chapter file {chapter_file.name}: {e}")
-            
-            # Optional: Add a delay between API calls if needed
-            # await asyncio.sleep(1) 
+                ))
+                for _ in range(N_BUILDERS)
+            ]
+            workers = [
+                asyncio.create_task(llm_worker(client, novel_id_str, build_q, write_q, failed))
+                for _ in range(LLM_MAX_CONCURRENCY)
+            ]
+            writer = asyncio.create_task(chapter_writer(write_q, flusher))
+
+            # Shut the stages down in order once each upstream stage has drained
+            for _ in builders:
+                files_q.put_nowait(None)
+            await asyncio.gather(*builders)
+            for _ in workers:
+                await build_q.put(None)
+            await asyncio.gather(*workers)
+            await write_q.put(None)
+            await writer
 
     except Exception as e:
         print(f"❌ An critical error occurred: {e}")
     finally:
+        await flusher.flush()
+        if novel is not None:
+            try:
+                await ChapterOperations.refresh_novel_counters(str(novel.id))
+            except Exception as e:
+                print(f"⚠️ Warning: Could not update chapter totals for '{novel.title}': {e}")
+        if failed:
+            print(f"⚠️ {len(failed)} chapters failed and can be retried on the next run:")
+            for chapter_number, error in sorted(failed):
+                print(f"   - Chapter {chapter_number}: {error}")
         await disconnect_from_mongodb()
         print("✅ Chapter analysis process finished.")
 
@@ -338,5 +617,11 @@ if __name__ == "__main__":
     # For Pydantic/Beanie compatibility with Uvicorn/FastAPI if models are used directly
     if sys.platform == "win32" and sys.version_info >= (3, 8):
          asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass  # uvloop is optional; fall back to the default asyncio loop
     
     asyncio.run(main()) 
\ No newline at end of file
@@ -165,4 +165,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass  # uvloop is optional; fall back to the default asyncio loop
+    
     asyncio.run(main()) 
\ No newline at end of file
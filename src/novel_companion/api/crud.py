@@ -2,90 +2,237 @@
 CRUD operations for Novel Companion AI
 """
 
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from sqlalchemy import bindparam, event, func, insert, literal_column, or_, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, defer, raiseload, selectinload
+from typing import Iterator, List, Optional, Dict, Any
 
 from ..models import database, schemas
+from ..services.cache import TTLCache
+
+
+# Chapters are effectively immutable once ingested, so per-novel chapter lists are cached.
+# Entries are detached schemas.Chapter snapshots rather than ORM rows; callers get copies.
+_chapters_cache = TTLCache(maxsize=64, ttl=300)
+
+
+def invalidate_novel_cache(novel_id: int) -> None:
+    """Drop cached reads for a novel after its data changes"""
+    _chapters_cache.pop(novel_id)
+
+
+def _invalidate_after_commit(session: Session, novel_id: int, committed: bool) -> None:
+    """Invalidate a novel's cached reads once its changes are committed"""
+    if committed:
+        invalidate_novel_cache(novel_id)
+    else:
+        # Dropping the entry before the commit would let a concurrent reader re-cache the old rows
+        event.listen(session, "after_commit", lambda _: invalidate_novel_cache(novel_id), once=True)
+
+
+@contextmanager
+def transaction(db: Session) -> Iterator[Session]:
+    """Group several CRUD calls (made with commit=False) into one commit, rolling back on error"""
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _insert_id(db: Session, db_obj: Any) -> int:
+    """Insert a row and return its primary key without refresh()'s extra SELECT"""
+    db.add(db_obj)
+    db.flush()  # The INSERT populates the primary key (RETURNING where supported)
+    obj_id = db_obj.id
+    db.commit()
+    return obj_id
 
 
 # Novel CRUD operations
+def _novel_mapping(novel: schemas.NovelCreate) -> Dict[str, Any]:
+    """Column values for a new novel"""
+    return {
+        "title": novel.title,
+        "author": novel.author,
+        "description": novel.description,
+        "content": novel.content,
+        "status": database.NovelStatusEnum.UPLOADED
+    }
+
+
 def create_novel(db: Session, novel: schemas.NovelCreate) -> database.Novel:
     """Create a new novel"""
-    db_novel = database.Novel(
-        title=novel.title,
-        author=novel.author,
-        description=novel.description,
-        content=novel.content,
-        status=database.NovelStatusEnum.UPLOADED
-    )
+    db_novel = database.Novel(**_novel_mapping(novel))
     db.add(db_novel)
     db.commit()
     db.refresh(db_novel)
     return db_novel
 
 
+def create_novel_id(db: Session, novel: schemas.NovelCreate) -> int:
+    """Create a new novel and return only its ID"""
+    return _insert_id(db, database.Novel(**_novel_mapping(novel)))
+
+
+# Loads every relationship serializers touch up front: one extra query each instead of one per novel
+_NOVEL_RELATIONSHIPS = (
+    selectinload(database.Novel.chapters),
+    selectinload(database.Novel.characters),
+    selectinload(database.Novel.analyses),
+)
+
+
 def get_novel(db: Session, novel_id: int) -> Optional[database.Novel]:
     """Get a novel by ID"""
-    return db.query(database.Novel).filter(database.Novel.id == novel_id).first()
+    return db.get(database.Novel, novel_id, options=_NOVEL_RELATIONSHIPS)
 
 
-def get_novels(db: Session, skip: int = 0, limit: int = 100) -> List[database.Novel]:
-    """Get all novels with pagination"""
-    return db.query(database.Novel).offset(skip).limit(limit).all()
+def get_novel_summary(db: Session, novel_id: int) -> Optional[database.Novel]:
+    """Get a novel by ID without relationships; touching one raises instead of lazy-loading"""
+    return db.get(database.Novel, novel_id, options=[raiseload("*")])
 
 
-def update_novel_status(db: Session, novel_id: int, status: str) -> bool:
+def get_novels(db: Session, skip: int = 0, limit: int = 100) -> List[database.Novel]:
+    """Get all novels with pagination"""
+    return db.query(database.Novel).options(
+        defer(database.Novel.content), *_NOVEL_RELATIONSHIPS
+    ).offset(skip).limit(limit).all()
+
+
+def get_novels_after(db: Session, after_id: Optional[int] = None, limit: int = 100) -> List[database.Novel]:
+    """Get novels newest-first using keyset pagination; pass the last id of a page to get the next"""
+    query = db.query(database.Novel).options(
+        defer(database.Novel.content), *_NOVEL_RELATIONSHIPS
+    ).order_by(database.Novel.id.desc())
+    if after_id is not None:
+        query = query.filter(database.Novel.id < after_id)
+    return query.limit(limit).all()
+
+
+def list_novels_summary(db: Session, skip: int = 0, limit: int = 100) -> List[schemas.NovelSummary]:
+    """Get novels for listings, selecting only the columns a listing displays"""
+    rows = db.query(
+        database.Novel.id,
+        database.Novel.title,
+        database.Novel.author,
+        database.Novel.status,
+        database.Novel.created_at
+    ).order_by(database.Novel.id).offset(skip).limit(limit).all()
+    return [
+        schemas.NovelSummary(
+            id=row.id,
+            title=row.title,
+            author=row.author,
+            status=row.status.value,
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
+
+
+def update_novel_status(db: Session, novel_id: int, status: str, commit: bool = True) -> bool:
     """Update novel processing status"""
-    db_novel = db.query(database.Novel).filter(database.Novel.id == novel_id).first()
-    if db_novel:
-        db_novel.status = database.NovelStatusEnum(status)
-        db_novel.updated_at = datetime.utcnow()
+    rows = db.query(database.Novel).filter(database.Novel.id == novel_id).update(
+        {"status": database.NovelStatusEnum(status), "updated_at": func.now()},
+        synchronize_session=False
+    )
+    if commit:
         db.commit()
-        return True
-    return False
+    _invalidate_after_commit(db, novel_id, commit)
+    return rows > 0
 
 
 def delete_novel(db: Session, novel_id: int) -> bool:
-    """Delete a novel"""
-    db_novel = db.query(database.Novel).filter(database.Novel.id == novel_id).first()
-    if db_novel:
-        db.delete(db_novel)
-        db.commit()
-        return True
-    return False
+    """Delete a novel and all related data"""
+    # Bulk deletes bypass the ORM cascade, so remove the children explicitly first
+    for model in (database.Chapter, database.Character, database.ChatHistory, database.Analysis):
+        db.query(model).filter(model.novel_id == novel_id).delete(synchronize_session=False)
+    rows = db.query(database.Novel).filter(database.Novel.id == novel_id).delete(synchronize_session=False)
+    db.commit()
+    invalidate_novel_cache(novel_id)
+    return rows > 0
 
 
 def get_novel_count(db: Session) -> int:
     """Get total number of novels"""
-    return db.query(database.Novel).count()
+    return db.query(func.count(database.Novel.id)).scalar()
 
 
 # Chapter CRUD operations
+def _chapter_mapping(novel_id: int, chapter_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a new chapter"""
+    return {
+        "novel_id": novel_id,
+        "title": chapter_data["title"],
+        "content": chapter_data["content"],
+        "chapter_number": chapter_data["chapter_number"]
+    }
+
+
 def create_chapter(db: Session, novel_id: int, chapter_data: Dict[str, Any]) -> database.Chapter:
     """Create a new chapter"""
-    db_chapter = database.Chapter(
-        novel_id=novel_id,
-        title=chapter_data["title"],
-        content=chapter_data["content"],
-        chapter_number=chapter_data["chapter_number"]
-    )
+    db_chapter = database.Chapter(**_chapter_mapping(novel_id, chapter_data))
     db.add(db_chapter)
     db.commit()
     db.refresh(db_chapter)
+    invalidate_novel_cache(novel_id)
     return db_chapter
 
 
+def create_chapter_id(db: Session, novel_id: int, chapter_data: Dict[str, Any]) -> int:
+    """Create a new chapter and return only its ID"""
+    chapter_id = _insert_id(db, database.Chapter(**_chapter_mapping(novel_id, chapter_data)))
+    invalidate_novel_cache(novel_id)
+    return chapter_id
+
+
+def create_chapters_bulk(db: Session, novel_id: int, chapter_data_list: List[Dict[str, Any]]) -> List[int]:
+    """Create many chapters in a single transaction, returning their IDs in input order"""
+    if not chapter_data_list:
+        return []
+    mappings = [_chapter_mapping(novel_id, chapter_data) for chapter_data in chapter_data_list]
+    # Bulk INSERT ... RETURNING: the IDs come back with the same statement, in input order
+    statement = insert(database.Chapter).returning(database.Chapter.id, sort_by_parameter_order=True)
+    chapter_ids = db.scalars(statement, mappings).all()
+    db.commit()
+    invalidate_novel_cache(novel_id)
+    return list(chapter_ids)
+
+
 def get_chapter(db: Session, chapter_id: int) -> Optional[database.Chapter]:
     """Get a chapter by ID"""
-    return db.query(database.Chapter).filter(database.Chapter.id == chapter_id).first()
+    return db.get(database.Chapter, chapter_id)
 
 
-def get_chapters_by_novel(db: Session, novel_id: int) -> List[database.Chapter]:
+def get_chapters_by_novel(db: Session, novel_id: int) -> List[schemas.Chapter]:
     """Get all chapters for a novel"""
-    return db.query(database.Chapter).filter(
-        database.Chapter.novel_id == novel_id
-    ).order_by(database.Chapter.chapter_number).all()
+    chapters = _chapters_cache.get(novel_id)
+    if chapters is None:
+        rows = db.query(database.Chapter).filter(
+            database.Chapter.novel_id == novel_id
+        ).order_by(database.Chapter.chapter_number).all()
+        chapters = tuple(schemas.Chapter.model_validate(row) for row in rows)
+        _chapters_cache.set(novel_id, chapters)
+    return [chapter.model_copy() for chapter in chapters]
+
+
+def find_chapters_mentioning(db: Session, novel_id: int, character_name: str) -> List[database.Chapter]:
+    """Get the chapters of a novel that mention a character"""
+    query = db.query(database.Chapter).filter(database.Chapter.novel_id == novel_id)
+    if db.bind.dialect.name == "postgresql":
+        # JSONB containment, served by the ix_chapter_chars_gin index
+        mentions = type_coerce(database.Chapter.characters_mentioned, JSONB)
+        return query.filter(mentions.contains([character_name])).order_by(database.Chapter.chapter_number).all()
+    return [
+        chapter for chapter in query.order_by(database.Chapter.chapter_number).all()
+        if character_name in (chapter.characters_mentioned or [])
+    ]
 
 
 def update_chapter_summary(
@@ -93,53 +240,82 @@ def update_chapter_summary(
     chapter_id: int, 
     summary: str, 
     key_events: List[str], 
-    characters_mentioned: List[str]
+    characters_mentioned: List[str],
+    commit: bool = True
 ) -> bool:
     """Update chapter summary and analysis"""
-    db_chapter = db.query(database.Chapter).filter(database.Chapter.id == chapter_id).first()
+    db_chapter = db.get(database.Chapter, chapter_id)
     if db_chapter:
         db_chapter.summary = summary
         db_chapter.key_events = key_events
         db_chapter.characters_mentioned = characters_mentioned
-        db.commit()
+        if commit:
+            db.commit()
+        _invalidate_after_commit(db, db_chapter.novel_id, commit)
         return True
     return False
 
 
 # Character CRUD operations
-def create_character(db: Session, novel_id: int, character_data: Dict[str, Any]) -> database.Character:
-    """Create a new character"""
-    
-    # Map character type from string to enum
-    character_type_mapping = {
-        "protagonist": database.CharacterTypeEnum.PROTAGONIST,
-        "antagonist": database.CharacterTypeEnum.ANTAGONIST,
-        "supporting": database.CharacterTypeEnum.SUPPORTING,
-        "minor": database.CharacterTypeEnum.MINOR
-    }
-    
-    character_type = character_type_mapping.get(
-        character_data.get("character_type", "supporting").lower(),
+# Map character type from string to enum (keys are casefolded)
+_CHARACTER_TYPE_MAP = MappingProxyType({
+    "protagonist": database.CharacterTypeEnum.PROTAGONIST,
+    "antagonist": database.CharacterTypeEnum.ANTAGONIST,
+    "supporting": database.CharacterTypeEnum.SUPPORTING,
+    "minor": database.CharacterTypeEnum.MINOR
+})
+
+
+def _get_character_type(character_data: Dict[str, Any]) -> database.CharacterTypeEnum:
+    """Map character type from string to enum"""
+    return _CHARACTER_TYPE_MAP.get(
+        (character_data.get("character_type") or "supporting").casefold(),
         database.CharacterTypeEnum.SUPPORTING
     )
-    
-    db_character = database.Character(
-        novel_id=novel_id,
-        name=character_data["name"],
-        description=character_data.get("description", ""),
-        character_type=character_type,
-        key_traits=character_data.get("key_traits", []),
-        relationships=character_data.get("relationships", [])
-    )
+
+
+def _character_mapping(novel_id: int, character_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a new character"""
+    return {
+        "novel_id": novel_id,
+        "name": character_data["name"],
+        "description": character_data.get("description", ""),
+        "character_type": _get_character_type(character_data),
+        "key_traits": character_data.get("key_traits", []),
+        "relationships": character_data.get("relationships", []),
+        "mentions_count": 0
+    }
+
+
+def create_character(db: Session, novel_id: int, character_data: Dict[str, Any]) -> database.Character:
+    """Create a new character"""
+    db_character = database.Character(**_character_mapping(novel_id, character_data))
     db.add(db_character)
     db.commit()
     db.refresh(db_character)
     return db_character
 
 
+def create_character_id(db: Session, novel_id: int, character_data: Dict[str, Any]) -> int:
+    """Create a new character and return only its ID"""
+    return _insert_id(db, database.Character(**_character_mapping(novel_id, character_data)))
+
+
+def create_characters_bulk(db: Session, novel_id: int, character_data_list: List[Dict[str, Any]]) -> List[int]:
+    """Create many characters in a single transaction, returning their IDs in input order"""
+    if not character_data_list:
+        return []
+    mappings = [_character_mapping(novel_id, character_data) for character_data in character_data_list]
+    # Bulk INSERT ... RETURNING: the IDs come back with the same statement, in input order
+    statement = insert(database.Character).returning(database.Character.id, sort_by_parameter_order=True)
+    character_ids = db.scalars(statement, mappings).all()
+    db.commit()
+    return list(character_ids)
+
+
 def get_character(db: Session, character_id: int) -> Optional[database.Character]:
     """Get a character by ID"""
-    return db.query(database.Character).filter(database.Character.id == character_id).first()
+    return db.get(database.Character, character_id)
 
 
 def get_characters_by_novel(db: Session, novel_id: int) -> List[database.Character]:
@@ -149,14 +325,19 @@ def get_characters_by_novel(db: Session, novel_id: int) -> List[database.Charact
     ).order_by(database.Character.mentions_count.desc()).all()
 
 
-def update_character_appearance(db: Session, character_id: int, chapter_number: int) -> bool:
+def update_character_appearance(db: Session, character_id: int, chapter_number: int, commit: bool = True) -> bool:
     """Update character's first appearance chapter"""
-    db_character = db.query(database.Character).filter(database.Character.id == character_id).first()
-    if db_character and (not db_character.first_appearance_chapter or chapter_number < db_character.first_appearance_chapter):
-        db_character.first_appearance_chapter = chapter_number
+    # The "earlier than the current one" check runs inside the UPDATE, so it's one race-free statement
+    rows = db.query(database.Character).filter(
+        database.Character.id == character_id,
+        or_(
+            database.Character.first_appearance_chapter.is_(None),
+            database.Character.first_appearance_chapter > chapter_number
+        )
+    ).update({"first_appearance_chapter": chapter_number}, synchronize_session=False)
+    if commit:
         db.commit()
-        return True
-    return False
+    return rows > 0
 
 
 # Chat History CRUD operations
@@ -187,7 +368,40 @@ def get_recent_chat_history(db: Session, novel_id: int, limit: int = 10) -> List
     ).order_by(database.ChatHistory.created_at.desc()).limit(limit).all()
 
 
+@dataclass
+class ChatContext:
+    """Everything a chat turn needs about a novel"""
+    history: List[database.ChatHistory] = field(default_factory=list)
+    top_characters: List[database.Character] = field(default_factory=list)
+    analyses: List[database.Analysis] = field(default_factory=list)
+
+
+def get_chat_context(
+    db: Session,
+    novel_id: int,
+    history_limit: int = 10,
+    character_limit: int = 5
+) -> ChatContext:
+    """Get recent chat history, top characters and analyses for a novel
+
+    A convenience wrapper around three separate queries issued one after another; it
+    saves callers the wiring, not round trips.
+    """
+    return ChatContext(
+        history=get_recent_chat_history(db, novel_id, limit=history_limit),
+        top_characters=get_popular_characters(db, novel_id, limit=character_limit),
+        analyses=get_analyses_by_novel(db, novel_id)
+    )
+
+
 # Analysis CRUD operations
+# Dialect-specific INSERT constructs supporting ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
 def create_analysis(
     db: Session, 
     novel_id: int, 
@@ -195,14 +409,31 @@ def create_analysis(
     results: Dict[str, Any],
     insights: Optional[List[str]] = None
 ) -> database.Analysis:
-    """Create a new analysis entry"""
-    db_analysis = database.Analysis(
-        novel_id=novel_id,
-        analysis_type=analysis_type,
-        results=results,
-        insights=insights or []
-    )
-    db.add(db_analysis)
+    """Create or replace the analysis of a given type for a novel"""
+    values = {
+        "novel_id": novel_id,
+        "analysis_type": analysis_type,
+        "results": results,
+        "insights": insights or []
+    }
+    dialect_insert = _UPSERT_INSERTS.get(db.bind.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(database.Analysis).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["novel_id", "analysis_type"],
+            set_={"results": stmt.excluded.results, "insights": stmt.excluded.insights, "updated_at": func.now()}
+        ).returning(database.Analysis)
+        db_analysis = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+        db.commit()
+        return db_analysis
+
+    db_analysis = get_analysis(db, novel_id, analysis_type)
+    if db_analysis:
+        db_analysis.results = values["results"]
+        db_analysis.insights = values["insights"]
+    else:
+        db_analysis = database.Analysis(**values)
+        db.add(db_analysis)
     db.commit()
     db.refresh(db_analysis)
     return db_analysis
@@ -226,7 +457,13 @@ def get_analyses_by_novel(db: Session, novel_id: int) -> List[database.Analysis]
 # Utility functions
 def search_novels(db: Session, query: str, limit: int = 10) -> List[database.Novel]:
     """Search novels by title or author"""
-    return db.query(database.Novel).filter(
+    if db.bind.dialect.name == "postgresql":
+        # Same expression as the ix_novel_search GIN index, so the lookup is index-served
+        search_query = func.plainto_tsquery(literal_column("'simple'"), query)
+        return db.query(database.Novel).options(defer(database.Novel.content)).filter(
+            database.novel_search_vector().op("@@")(search_query)
+        ).limit(limit).all()
+    return db.query(database.Novel).options(defer(database.Novel.content)).filter(
         database.Novel.title.contains(query) | 
         database.Novel.author.contains(query)
     ).limit(limit).all()
@@ -239,11 +476,28 @@ def get_popular_characters(db: Session, novel_id: int, limit: int = 5) -> List[d
     ).order_by(database.Character.mentions_count.desc()).limit(limit).all()
 
 
-def update_character_mentions(db: Session, character_id: int, increment: int = 1) -> bool:
+def update_character_mentions(db: Session, character_id: int, increment: int = 1, commit: bool = True) -> bool:
     """Update character mention count"""
-    db_character = db.query(database.Character).filter(database.Character.id == character_id).first()
-    if db_character:
-        db_character.mentions_count += increment
+    # Incremented server-side so concurrent updates can't lose each other's counts
+    rows = db.query(database.Character).filter(database.Character.id == character_id).update(
+        {"mentions_count": database.Character.mentions_count + increment},
+        synchronize_session=False
+    )
+    if commit:
         db.commit()
-        return True
-    return False 
\ No newline at end of file
+    return rows > 0
+
+
+def bulk_update_character_mentions(db: Session, counts: Dict[int, int], commit: bool = True) -> None:
+    """Increment mention counts for many characters ({character_id: increment}) in one statement"""
+    if not counts:
+        return
+    characters = database.Character.__table__
+    stmt = (
+        update(characters)
+        .where(characters.c.id == bindparam("cid"))
+        .values(mentions_count=characters.c.mentions_count + bindparam("inc"))
+    )
+    db.execute(stmt, [{"cid": character_id, "inc": increment} for character_id, increment in counts.items()])
+    if commit:
+        db.commit() 
\ No newline at end of file
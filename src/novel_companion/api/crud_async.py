@@ -0,0 +1,399 @@
+"""
+Async CRUD operations for Novel Companion AI
+
+Mirrors crud.py on top of AsyncSession so database waits release the event loop.
+Relationships must be loaded eagerly here: lazy loads are not possible under asyncio.
+"""
+
+from sqlalchemy import bindparam, delete, func, insert, literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, raiseload
+from typing import List, Optional, Dict, Any
+
+from ..models import database, schemas
+from .crud import (
+    ChatContext,
+    _NOVEL_RELATIONSHIPS,
+    _UPSERT_INSERTS,
+    _chapter_mapping,
+    _character_mapping,
+    _invalidate_after_commit,
+    _novel_mapping,
+    invalidate_novel_cache,
+)
+
+
+# Novel CRUD operations
+async def create_novel(db: AsyncSession, novel: schemas.NovelCreate) -> database.Novel:
+    """Create a new novel"""
+    db_novel = database.Novel(**_novel_mapping(novel))
+    db.add(db_novel)
+    await db.commit()
+    await db.refresh(db_novel)
+    return db_novel
+
+
+async def get_novel(db: AsyncSession, novel_id: int) -> Optional[database.Novel]:
+    """Get a novel by ID"""
+    return await db.get(database.Novel, novel_id, options=_NOVEL_RELATIONSHIPS)
+
+
+async def get_novel_summary(db: AsyncSession, novel_id: int) -> Optional[database.Novel]:
+    """Get a novel by ID without relationships"""
+    return await db.get(database.Novel, novel_id, options=[raiseload("*")])
+
+
+async def get_novels(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[database.Novel]:
+    """Get all novels with pagination"""
+    result = await db.scalars(
+        select(database.Novel)
+        .options(defer(database.Novel.content), *_NOVEL_RELATIONSHIPS)
+        .offset(skip).limit(limit)
+    )
+    return list(result)
+
+
+async def get_novels_after(db: AsyncSession, after_id: Optional[int] = None, limit: int = 100) -> List[database.Novel]:
+    """Get novels newest-first using keyset pagination"""
+    stmt = select(database.Novel).options(
+        defer(database.Novel.content), *_NOVEL_RELATIONSHIPS
+    ).order_by(database.Novel.id.desc())
+    if after_id is not None:
+        stmt = stmt.where(database.Novel.id < after_id)
+    return list(await db.scalars(stmt.limit(limit)))
+
+
+async def list_novels_summary(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[schemas.NovelSummary]:
+    """Get novels for listings, selecting only the columns a listing displays"""
+    result = await db.execute(
+        select(
+            database.Novel.id,
+            database.Novel.title,
+            database.Novel.author,
+            database.Novel.status,
+            database.Novel.created_at
+        ).order_by(database.Novel.id).offset(skip).limit(limit)
+    )
+    return [
+        schemas.NovelSummary(
+            id=row.id,
+            title=row.title,
+            author=row.author,
+            status=row.status.value,
+            created_at=row.created_at
+        )
+        for row in result
+    ]
+
+
+async def update_novel_status(db: AsyncSession, novel_id: int, status: str, commit: bool = True) -> bool:
+    """Update novel processing status"""
+    result = await db.execute(
+        update(database.Novel)
+        .where(database.Novel.id == novel_id)
+        .values(status=database.NovelStatusEnum(status), updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        await db.commit()
+    _invalidate_after_commit(db.sync_session, novel_id, commit)
+    return result.rowcount > 0
+
+
+async def delete_novel(db: AsyncSession, novel_id: int) -> bool:
+    """Delete a novel and all related data"""
+    for model in (database.Chapter, database.Character, database.ChatHistory, database.Analysis):
+        await db.execute(
+            delete(model).where(model.novel_id == novel_id).execution_options(synchronize_session=False)
+        )
+    result = await db.execute(
+        delete(database.Novel).where(database.Novel.id == novel_id).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    invalidate_novel_cache(novel_id)
+    return result.rowcount > 0
+
+
+async def get_novel_count(db: AsyncSession) -> int:
+    """Get total number of novels"""
+    return await db.scalar(select(func.count(database.Novel.id)))
+
+
+# Chapter CRUD operations
+async def create_chapter(db: AsyncSession, novel_id: int, chapter_data: Dict[str, Any]) -> database.Chapter:
+    """Create a new chapter"""
+    db_chapter = database.Chapter(**_chapter_mapping(novel_id, chapter_data))
+    db.add(db_chapter)
+    await db.commit()
+    await db.refresh(db_chapter)
+    invalidate_novel_cache(novel_id)
+    return db_chapter
+
+
+async def create_chapters_bulk(db: AsyncSession, novel_id: int, chapter_data_list: List[Dict[str, Any]]) -> List[int]:
+    """Create many chapters in a single transaction, returning their IDs in input order"""
+    if not chapter_data_list:
+        return []
+    mappings = [_chapter_mapping(novel_id, chapter_data) for chapter_data in chapter_data_list]
+    # sort_by_parameter_order keeps the IDs aligned with the input rows
+    statement = insert(database.Chapter).returning(database.Chapter.id, sort_by_parameter_order=True)
+    chapter_ids = await db.scalars(statement, mappings)
+    chapter_ids = list(chapter_ids)
+    await db.commit()
+    invalidate_novel_cache(novel_id)
+    return chapter_ids
+
+
+async def get_chapter(db: AsyncSession, chapter_id: int) -> Optional[database.Chapter]:
+    """Get a chapter by ID"""
+    return await db.get(database.Chapter, chapter_id)
+
+
+async def get_chapters_by_novel(db: AsyncSession, novel_id: int) -> List[database.Chapter]:
+    """Get all chapters for a novel"""
+    result = await db.scalars(
+        select(database.Chapter)
+        .where(database.Chapter.novel_id == novel_id)
+        .order_by(database.Chapter.chapter_number)
+    )
+    return list(result)
+
+
+async def update_chapter_summary(
+    db: AsyncSession,
+    chapter_id: int,
+    summary: str,
+    key_events: List[str],
+    characters_mentioned: List[str],
+    commit: bool = True
+) -> bool:
+    """Update chapter summary and analysis"""
+    db_chapter = await db.get(database.Chapter, chapter_id)
+    if db_chapter:
+        db_chapter.summary = summary
+        db_chapter.key_events = key_events
+        db_chapter.characters_mentioned = characters_mentioned
+        if commit:
+            await db.commit()
+        _invalidate_after_commit(db.sync_session, db_chapter.novel_id, commit)
+        return True
+    return False
+
+
+# Character CRUD operations
+async def create_character(db: AsyncSession, novel_id: int, character_data: Dict[str, Any]) -> database.Character:
+    """Create a new character"""
+    db_character = database.Character(**_character_mapping(novel_id, character_data))
+    db.add(db_character)
+    await db.commit()
+    await db.refresh(db_character)
+    return db_character
+
+
+async def create_characters_bulk(db: AsyncSession, novel_id: int, character_data_list: List[Dict[str, Any]]) -> List[int]:
+    """Create many characters in a single transaction, returning their IDs in input order"""
+    if not character_data_list:
+        return []
+    mappings = [_character_mapping(novel_id, character_data) for character_data in character_data_list]
+    # sort_by_parameter_order keeps the IDs aligned with the input rows
+    statement = insert(database.Character).returning(database.Character.id, sort_by_parameter_order=True)
+    character_ids = await db.scalars(statement, mappings)
+    character_ids = list(character_ids)
+    await db.commit()
+    return character_ids
+
+
+async def get_character(db: AsyncSession, character_id: int) -> Optional[database.Character]:
+    """Get a character by ID"""
+    return await db.get(database.Character, character_id)
+
+
+async def get_characters_by_novel(db: AsyncSession, novel_id: int) -> List[database.Character]:
+    """Get all characters for a novel"""
+    result = await db.scalars(
+        select(database.Character)
+        .where(database.Character.novel_id == novel_id)
+        .order_by(database.Character.mentions_count.desc())
+    )
+    return list(result)
+
+
+async def update_character_appearance(db: AsyncSession, character_id: int, chapter_number: int, commit: bool = True) -> bool:
+    """Update character's first appearance chapter"""
+    result = await db.execute(
+        update(database.Character)
+        .where(
+            database.Character.id == character_id,
+            or_(
+                database.Character.first_appearance_chapter.is_(None),
+                database.Character.first_appearance_chapter > chapter_number
+            )
+        )
+        .values(first_appearance_chapter=chapter_number)
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        await db.commit()
+    return result.rowcount > 0
+
+
+# Chat History CRUD operations
+async def create_chat_history(
+    db: AsyncSession,
+    novel_id: int,
+    user_message: str,
+    assistant_response: str,
+    context_used: Optional[List[str]] = None
+) -> database.ChatHistory:
+    """Create a new chat history entry"""
+    db_chat = database.ChatHistory(
+        novel_id=novel_id,
+        user_message=user_message,
+        assistant_response=assistant_response,
+        context_used=context_used or []
+    )
+    db.add(db_chat)
+    await db.commit()
+    await db.refresh(db_chat)
+    return db_chat
+
+
+async def get_recent_chat_history(db: AsyncSession, novel_id: int, limit: int = 10) -> List[database.ChatHistory]:
+    """Get recent chat history for a novel"""
+    result = await db.scalars(
+        select(database.ChatHistory)
+        .where(database.ChatHistory.novel_id == novel_id)
+        .order_by(database.ChatHistory.created_at.desc())
+        .limit(limit)
+    )
+    return list(result)
+
+
+async def get_chat_context(
+    db: AsyncSession,
+    novel_id: int,
+    history_limit: int = 10,
+    character_limit: int = 5
+) -> ChatContext:
+    """Get recent chat history, top characters and analyses for a novel
+
+    A convenience wrapper around three separate queries issued one after another; it
+    saves callers the wiring, not round trips.
+    """
+    return ChatContext(
+        history=await get_recent_chat_history(db, novel_id, limit=history_limit),
+        top_characters=await get_popular_characters(db, novel_id, limit=character_limit),
+        analyses=await get_analyses_by_novel(db, novel_id)
+    )
+
+
+# Analysis CRUD operations
+async def create_analysis(
+    db: AsyncSession,
+    novel_id: int,
+    analysis_type: str,
+    results: Dict[str, Any],
+    insights: Optional[List[str]] = None
+) -> database.Analysis:
+    """Create or replace the analysis of a given type for a novel"""
+    values = {
+        "novel_id": novel_id,
+        "analysis_type": analysis_type,
+        "results": results,
+        "insights": insights or []
+    }
+    dialect_insert = _UPSERT_INSERTS.get(db.bind.dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(database.Analysis).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["novel_id", "analysis_type"],
+            set_={"results": stmt.excluded.results, "insights": stmt.excluded.insights, "updated_at": func.now()}
+        ).returning(database.Analysis)
+        db_analysis = (await db.scalars(stmt, execution_options={"populate_existing": True})).one()
+        await db.commit()
+        return db_analysis
+
+    db_analysis = await get_analysis(db, novel_id, analysis_type)
+    if db_analysis:
+        db_analysis.results = values["results"]
+        db_analysis.insights = values["insights"]
+    else:
+        db_analysis = database.Analysis(**values)
+        db.add(db_analysis)
+    await db.commit()
+    await db.refresh(db_analysis)
+    return db_analysis
+
+
+async def get_analysis(db: AsyncSession, novel_id: int, analysis_type: str) -> Optional[database.Analysis]:
+    """Get analysis by novel and type"""
+    return await db.scalar(
+        select(database.Analysis).where(
+            database.Analysis.novel_id == novel_id,
+            database.Analysis.analysis_type == analysis_type
+        ).limit(1)
+    )
+
+
+async def get_analyses_by_novel(db: AsyncSession, novel_id: int) -> List[database.Analysis]:
+    """Get all analyses for a novel"""
+    result = await db.scalars(
+        select(database.Analysis)
+        .where(database.Analysis.novel_id == novel_id)
+        .order_by(database.Analysis.created_at.desc())
+    )
+    return list(result)
+
+
+# Utility functions
+async def search_novels(db: AsyncSession, query: str, limit: int = 10) -> List[database.Novel]:
+    """Search novels by title or author"""
+    stmt = select(database.Novel).options(defer(database.Novel.content))
+    if db.bind.dialect.name == "postgresql":
+        search_query = func.plainto_tsquery(literal_column("'simple'"), query)
+        stmt = stmt.where(database.novel_search_vector().op("@@")(search_query))
+    else:
+        stmt = stmt.where(
+            database.Novel.title.contains(query) |
+            database.Novel.author.contains(query)
+        )
+    return list(await db.scalars(stmt.limit(limit)))
+
+
+async def get_popular_characters(db: AsyncSession, novel_id: int, limit: int = 5) -> List[database.Character]:
+    """Get most mentioned characters in a novel"""
+    result = await db.scalars(
+        select(database.Character)
+        .where(database.Character.novel_id == novel_id)
+        .order_by(database.Character.mentions_count.desc())
+        .limit(limit)
+    )
+    return list(result)
+
+
+async def update_character_mentions(db: AsyncSession, character_id: int, increment: int = 1, commit: bool = True) -> bool:
+    """Update character mention count"""
+    result = await db.execute(
+        update(database.Character)
+        .where(database.Character.id == character_id)
+        .values(mentions_count=database.Character.mentions_count + increment)
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        await db.commit()
+    return result.rowcount > 0
+
+
+async def bulk_update_character_mentions(db: AsyncSession, counts: Dict[int, int], commit: bool = True) -> None:
+    """Increment mention counts for many characters ({character_id: increment}) in one statement"""
+    if not counts:
+        return
+    characters = database.Character.__table__
+    stmt = (
+        update(characters)
+        .where(characters.c.id == bindparam("cid"))
+        .values(mentions_count=characters.c.mentions_count + bindparam("inc"))
+    )
+    await db.execute(stmt, [{"cid": character_id, "inc": increment} for character_id, increment in counts.items()])
+    if commit:
+        await db.commit()
@@ -2,13 +2,18 @@
 FastAPI main application for Novel Companion AI - MongoDB Version
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import os
-from typing import List, Optional, Dict, Any
+import asyncio
+import uuid
+import codecs
+import hashlib
+import aiofiles
+from typing import Annotated, List, Optional, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 
@@ -17,8 +22,10 @@ from ..models.mongodb_connection import (
     disconnect_from_mongodb,
     get_novel_by_id,
     get_novel_by_title,
-    get_chapters_by_novel_id,
-    get_characters_by_novel_id,
+    iter_chapters_by_novel_id,
+    get_novel_characters_if_exists,
+    get_chat_context,
+    invalidate_chat_context,
     search_novels
 )
 from ..models.mongodb_models import Novel, Chapter, Character, ChatHistory
@@ -26,6 +33,31 @@ from ..models.mongodb_operations import NovelOperations, ChapterOperations, Char
 from ..services.openrouter_client import openrouter_client
 from ..services.nlp_processor import nlp_processor
 from ..config import settings
+from .schemas import (
+    NovelCreateRequest,
+    NovelResponse,
+    AnalysisData,
+    ChapterResponse,
+    CharacterResponse,
+    ChapterSummaryRequest,
+    ChapterSummaryResponse,
+    ChatRequest,
+    ChatResponse,
+    FileUploadResponse,
+    construct_trusted,
+)
+
+# Uploads are read and spooled to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Leading bytes of an upload checked for binary content before anything is stored
+UPLOAD_SNIFF_SIZE = 4096
+
+# Maximum number of chapters written per insert_many call
+CHAPTER_INSERT_BATCH_SIZE = 1000
+
+# Concurrent single-document inserts when bulk inserts are disabled
+CHAPTER_INSERT_CONCURRENCY = 20
 
 # Create upload directory if it doesn't exist
 os.makedirs(settings.upload_directory, exist_ok=True)
@@ -47,7 +79,8 @@ app = FastAPI(
     title="Novel Companion AI",
     description="AI-driven reading assistant with intelligent chapter summarization, dynamic character mapping, and interactive story companion using MongoDB",
     version="0.2.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -59,235 +92,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# All JSON endpoints live under /api
+router = APIRouter(prefix="/api")
 
-# Updated Pydantic models for MongoDB
-from pydantic import BaseModel, Field, ConfigDict
-
-class NovelCreateRequest(BaseModel):
-    """Request model for creating a novel"""
-    title: str = Field(..., min_length=1, max_length=200)
-    author: Optional[str] = Field(None, max_length=100)
-    description: Optional[str] = Field(None, max_length=1000)
-    content: str = Field(..., min_length=100)
 
-class NovelResponse(BaseModel):
-    """Response model for novel data"""
-    id: str
-    title: str
-    author: Optional[str] = None
-    description: Optional[str] = None
-    genres: List[str] = []
-    tags: List[str] = []
-    average_rating: Optional[float] = None
-    vote_count: Optional[int] = None
-    year: Optional[int] = None
-    status_in_coo: Optional[str] = None
-    created_at: datetime
-    last_updated: datetime
-
-# Detailed models for chapter analysis data
-class ChapterMetadata(BaseModel):
-    """Chapter metadata model"""
-    novel_id: Optional[str] = None
-    chapter_id: Optional[str] = None
-    novel_title: Optional[str] = None
-    chapter_number: Optional[int] = None
-    chapter_title: Optional[str] = None
-    word_count: Optional[int] = None
-    estimated_reading_time: Optional[int] = None
-
-class EmotionalArc(BaseModel):
-    """Emotional arc model"""
-    emotion: Optional[str] = None
-    intensity: Optional[float] = None
-
-class CharacterSentiment(BaseModel):
-    """Character sentiment model"""
-    dominant_emotions: Optional[List[str]] = []
-    emotional_state: Optional[str] = None
-
-class SentimentAnalysis(BaseModel):
-    """Sentiment analysis model"""
-    overall_tone: Optional[str] = None
-    emotional_arc: Optional[List[EmotionalArc]] = []
-    character_sentiments: Optional[Dict[str, CharacterSentiment]] = {}
-
-class ChapterSummary(BaseModel):
-    """Chapter summary model"""
-    concise: Optional[str] = None
-    detailed: Optional[str] = None
-    key_events: Optional[List[str]] = []
-
-class Theme(BaseModel):
-    """Theme model"""
-    theme: Optional[str] = None
-    relevance: Optional[float] = None
-    evidence: Optional[str] = None
-
-class Foreshadowing(BaseModel):
-    """Foreshadowing model"""
-    text: Optional[str] = None
-    significance: Optional[str] = None
-
-class Symbolism(BaseModel):
-    """Symbolism model"""
-    symbol: Optional[str] = None
-    meaning: Optional[str] = None
-
-class LiteraryElements(BaseModel):
-    """Literary elements model"""
-    narrative_voice: Optional[str] = None
-    foreshadowing: Optional[List[Foreshadowing]] = []
-    symbolism: Optional[List[Symbolism]] = []
-
-class ChapterAnalysis(BaseModel):
-    """Chapter analysis model"""
-    metadata: Optional[ChapterMetadata] = None
-    summary: Optional[ChapterSummary] = None
-    sentiment_analysis: Optional[SentimentAnalysis] = None
-    themes: Optional[List[Theme]] = []
-    literary_elements: Optional[LiteraryElements] = None
-
-class CharacterProfile(BaseModel):
-    """Character profile model"""
-    name: Optional[str] = None
-    role: Optional[str] = None
-    first_appearance: Optional[str] = None
-    description: Optional[str] = None
-    key_traits: Optional[List[str]] = []
-    quotes: Optional[List[str]] = []
-    development_status: Optional[str] = None
-
-class Relationship(BaseModel):
-    """Character relationship model"""
-    characters: Optional[List[str]] = []
-    relationship_type: Optional[str] = None
-    dynamics: Optional[str] = None
-    significance: Optional[str] = None
-    interaction_count: Optional[int] = None
-    sentiment: Optional[str] = None
-
-class CharacterMapping(BaseModel):
-    """Character mapping model"""
-    characters: Optional[List[CharacterProfile]] = []
-    relationships: Optional[List[Relationship]] = []
-
-class ChapterContext(BaseModel):
-    """Chapter context model"""
-    setting: Optional[str] = None
-    timeline_position: Optional[str] = None
-    narrative_importance: Optional[str] = None
-
-class InteractiveCompanion(BaseModel):
-    """Interactive companion model"""
-    chapter_context: Optional[ChapterContext] = None
-    key_question: Optional[List[str]] = []
-    suggested_discussion_point: Optional[List[str]] = []
-
-class ComplexityMetrics(BaseModel):
-    """Complexity metrics model"""
-    readability_score: Optional[int] = None
-    vocabulary_level: Optional[str] = None
-    structural_complexity: Optional[str] = None
-
-class PacingShift(BaseModel):
-    """Pacing shift model"""
-    position: Optional[str] = None
-    change: Optional[str] = None
-
-class PacingAnalysis(BaseModel):
-    """Pacing analysis model"""
-    overall_pace: Optional[str] = None
-    significant_shifts: Optional[List[PacingShift]] = []
-
-class EngagementFactors(BaseModel):
-    """Engagement factors model"""
-    hook: Optional[List[str]] = []
-    engagement_score: Optional[float] = None
-
-class ReadingAnalytics(BaseModel):
-    """Reading analytics model"""
-    complexity_metrics: Optional[ComplexityMetrics] = None
-    complexity_metric: Optional[ComplexityMetrics] = None  # Handle both field names
-    pacing_analysis: Optional[PacingAnalysis] = None
-    engagement_factors: Optional[EngagementFactors] = None
-    
-    model_config = ConfigDict(extra='allow')
-
-class AnalysisData(BaseModel):
-    """Complete analysis data model"""
-    chapter_analysis: Optional[ChapterAnalysis] = None
-    character_mapping: Optional[CharacterMapping] = None
-    interactive_companion: Optional[InteractiveCompanion] = None
-    reading_analytics: Optional[ReadingAnalytics] = None
-    
-    model_config = ConfigDict(extra='allow', populate_by_name=True)
-
-class ChapterResponse(BaseModel):
-    """Response model for chapter data"""
-    id: str
-    novel_id: str
-    title: str
-    chapter_number: int
-    content: Optional[str] = None  # Optional in response, might be too large
-    summary: Optional[str] = None
-    analysis_data: Optional[AnalysisData] = None
-    key_events: List[str] = []
-    characters_mentioned: List[str] = []
-    themes: List[str] = []
-    sentiment_score: Optional[float] = None
-    word_count: Optional[int] = None
-    reading_time_minutes: Optional[int] = None
-    is_processed: bool = False
-    processing_timestamp: Optional[datetime] = None
-    created_at: datetime
-    updated_at: Optional[datetime] = None
-
-class CharacterResponse(BaseModel):
-    """Response model for character data"""
-    id: str
-    novel_id: str
-    name: str
-    description: Optional[str] = None
-    character_type: Optional[str] = None
-    first_appearance_chapter: Optional[int] = None
-    relationships: List[Dict[str, str]] = []
-    key_traits: List[str] = []
-    mentions_count: int = 0
-    chapters_appeared: List[int] = []
-
-class ChapterSummaryRequest(BaseModel):
-    """Request model for chapter summarization"""
-    summary_length: Optional[str] = Field("medium", pattern="^(short|medium|long)$")
-
-class ChapterSummaryResponse(BaseModel):
-    """Response model for chapter summarization"""
-    chapter_id: str
-    summary: str
-    key_events: List[str]
-    characters_mentioned: List[str]
-
-class ChatRequest(BaseModel):
-    """Chat request model"""
-    message: str = Field(..., min_length=1, max_length=1000)
-
-class ChatResponse(BaseModel):
-    """Chat response model"""
-    response: str
-    references: List[str] = []
-    suggested_questions: List[str] = []
-
-class FileUploadResponse(BaseModel):
-    """File upload response"""
-    filename: str
-    size: int
-    message: str
-    novel_id: Optional[str] = None
+async def get_novel_dep(novel_id: str) -> Novel:
+    """Resolve the novel_id path parameter to a novel, or 404"""
+    try:
+        novel = await get_novel_by_id(novel_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting novel: {str(e)}")
+    if novel is None:
+        raise HTTPException(status_code=404, detail="Novel not found")
+    return novel
 
 
 # API Endpoints
+#
+# Response models are built with from_db (model_construct) from Beanie documents: the
+# data was validated by Beanie when it was inserted, so validating it again on
+# every read is pure overhead. Request models still go through full validation
+# because they carry untrusted client input.
 
-@app.post("/api/novels/", response_model=NovelResponse)
+@router.post("/novels/", response_model=NovelResponse)
 async def create_novel(
     novel: NovelCreateRequest,
     background_tasks: BackgroundTasks
@@ -295,12 +122,13 @@ async def create_novel(
     """Create a new novel and start processing"""
     try:
         # Create novel in MongoDB
+        now = datetime.utcnow()
         novel_data = {
             "title": novel.title,
             "author": novel.author,
             "description": novel.description,
-            "created_at": datetime.utcnow(),
-            "last_updated": datetime.utcnow()
+            "created_at": now,
+            "last_updated": now
         }
         
         db_novel = await NovelOperations.create_novel(novel_data)
@@ -308,24 +136,11 @@ async def create_novel(
         # Add background task to process content
         background_tasks.add_task(process_novel_async, str(db_novel.id), novel.content)
         
-        return NovelResponse(
-            id=str(db_novel.id),
-            title=db_novel.title,
-            author=db_novel.author,
-            description=db_novel.description,
-            genres=db_novel.genres,
-            tags=db_novel.tags,
-            average_rating=db_novel.average_rating,
-            vote_count=db_novel.vote_count,
-            year=db_novel.year,
-            status_in_coo=db_novel.status_in_coo,
-            created_at=db_novel.created_at,
-            last_updated=db_novel.last_updated
-        )
+        return NovelResponse.from_db(db_novel)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating novel: {str(e)}")
 
-@app.get("/api/novels/", response_model=List[NovelResponse])
+@router.get("/novels/", response_model=List[NovelResponse])
 async def list_novels(
     skip: int = 0, 
     limit: int = 100,
@@ -349,97 +164,53 @@ async def list_novels(
             limit=limit
         )
         
-        return [
-            NovelResponse(
-                id=str(novel.id),
-                title=novel.title,
-                author=novel.author,
-                description=novel.description,
-                genres=novel.genres,
-                tags=novel.tags,
-                average_rating=novel.average_rating,
-                vote_count=novel.vote_count,
-                year=novel.year,
-                status_in_coo=novel.status_in_coo,
-                created_at=novel.created_at,
-                last_updated=novel.last_updated
-            )
-            for novel in novels
-        ]
+        return [NovelResponse.from_db(novel) for novel in novels]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing novels: {str(e)}")
 
-@app.get("/api/novels/{novel_id}", response_model=NovelResponse)
-async def get_novel(novel_id: str):
+@router.get("/novels/{novel_id}", response_model=NovelResponse)
+async def get_novel(novel: Annotated[Novel, Depends(get_novel_dep)]):
     """Get a specific novel"""
-    try:
-        novel = await get_novel_by_id(novel_id)
-        if novel is None:
-            raise HTTPException(status_code=404, detail="Novel not found")
-        
-        return NovelResponse(
-            id=str(novel.id),
-            title=novel.title,
-            author=novel.author,
-            description=novel.description,
-            genres=novel.genres,
-            tags=novel.tags,
-            average_rating=novel.average_rating,
-            vote_count=novel.vote_count,
-            year=novel.year,
-            status_in_coo=novel.status_in_coo,
-            created_at=novel.created_at,
-            last_updated=novel.last_updated
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting novel: {str(e)}")
+    return NovelResponse.from_db(novel)
 
-@app.get("/api/novels/{novel_id}/chapters", response_model=List[ChapterResponse])
+@router.get("/novels/{novel_id}/chapters", response_model=List[ChapterResponse])
 async def get_novel_chapters(
     novel_id: str,
+    novel: Annotated[Novel, Depends(get_novel_dep)],
     skip: int = 0,
     limit: int = 100,
     include_content: bool = False
 ):
     """Get chapters for a specific novel"""
+    # The novel dependency has already 404'd before the response starts streaming
+    chapters = iter_chapters_by_novel_id(
+        novel_id, skip=skip, limit=limit, include_content=include_content
+    )
+    return StreamingResponse(
+        _stream_chapters(novel_id, chapters, include_content),
+        media_type="application/json"
+    )
+
+async def _stream_chapters(novel_id: str, chapters, include_content: bool):
+    """Encode chapters as a JSON array one element at a time, straight off the cursor"""
+    yield b"["
+    first = True
     try:
-        # Verify novel exists
-        novel = await get_novel_by_id(novel_id)
-        if not novel:
-            raise HTTPException(status_code=404, detail="Novel not found")
-        
-        chapters = await get_chapters_by_novel_id(novel_id, skip=skip, limit=limit)
-        
-        return [
-            ChapterResponse(
-                id=str(chapter.id),
-                novel_id=chapter.novel_id,
-                title=chapter.title,
-                chapter_number=chapter.chapter_number,
-                content=chapter.content if include_content else None,
-                summary=chapter.summary,
-                analysis_data=safe_parse_analysis_data(chapter.analysis_data),
-                key_events=chapter.key_events,
-                characters_mentioned=chapter.characters_mentioned,
-                themes=chapter.themes,
-                sentiment_score=chapter.sentiment_score,
-                word_count=chapter.word_count,
-                reading_time_minutes=chapter.reading_time_minutes,
-                is_processed=chapter.is_processed,
-                processing_timestamp=chapter.processing_timestamp,
-                created_at=chapter.created_at,
-                updated_at=chapter.updated_at
+        async for chapter in chapters:
+            response = ChapterResponse.from_db(
+                chapter,
+                include_content,
+                safe_parse_analysis_data(chapter.analysis_data, chapter.analysis_data_validated)
             )
-            for chapter in chapters
-        ]
-    except HTTPException:
-        raise
+            yield (b"" if first else b",") + response.model_dump_json().encode()
+            first = False
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting chapters: {str(e)}")
+        # Headers are already sent; abort the body rather than send a truncated but valid array
+        print(f"❌ Error streaming chapters for novel {novel_id}: {e}")
+        raise
+    yield b"]"
 
-@app.get("/api/chapters/{chapter_id}", response_model=ChapterResponse)
+@router.get("/chapters/{chapter_id}", response_model=ChapterResponse)
 async def get_chapter(
     chapter_id: str,
     include_content: bool = True
@@ -452,31 +223,17 @@ async def get_chapter(
         if not chapter:
             raise HTTPException(status_code=404, detail="Chapter not found")
         
-        return ChapterResponse(
-            id=str(chapter.id),
-            novel_id=chapter.novel_id,
-            title=chapter.title,
-            chapter_number=chapter.chapter_number,
-            content=chapter.content if include_content else None,
-            summary=chapter.summary,
-            analysis_data=safe_parse_analysis_data(chapter.analysis_data),
-            key_events=chapter.key_events,
-            characters_mentioned=chapter.characters_mentioned,
-            themes=chapter.themes,
-            sentiment_score=chapter.sentiment_score,
-            word_count=chapter.word_count,
-            reading_time_minutes=chapter.reading_time_minutes,
-            is_processed=chapter.is_processed,
-            processing_timestamp=chapter.processing_timestamp,
-            created_at=chapter.created_at,
-            updated_at=chapter.updated_at
+        return ChapterResponse.from_db(
+            chapter,
+            include_content,
+            safe_parse_analysis_data(chapter.analysis_data, chapter.analysis_data_validated)
         )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting chapter: {str(e)}")
 
-@app.post("/api/upload/", response_model=FileUploadResponse)
+@router.post("/upload/", response_model=FileUploadResponse)
 async def upload_novel_file(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
@@ -484,38 +241,62 @@ async def upload_novel_file(
     author: Optional[str] = None
 ):
     """Upload a novel file"""
+    if file.size and file.size > settings.max_file_size:
+        raise HTTPException(status_code=413, detail="File too large")
+    
+    extension = os.path.splitext(file.filename or "")[1].lstrip(".").lower()
+    if extension not in settings.allowed_file_types_set:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: .{extension}")
+    
+    # Spool the upload to disk chunk by chunk, checking it is UTF-8 as the bytes arrive
+    # so no single decode blocks the loop; the text itself is built in the background task
+    upload_path = os.path.join(settings.upload_directory, f"{uuid.uuid4().hex}.upload")
     try:
-        if file.size and file.size > settings.max_file_size:
-            raise HTTPException(status_code=413, detail="File too large")
-        
-        content = await file.read()
-        content_str = content.decode('utf-8')
+        size = 0
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        async with aiofiles.open(upload_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if not size and b"\x00" in chunk[:UPLOAD_SNIFF_SIZE]:
+                    # NUL bytes never appear in text; this is a binary file under a text name
+                    raise HTTPException(status_code=415, detail="File does not look like text")
+                size += len(chunk)
+                if size > settings.max_file_size:
+                    raise HTTPException(status_code=413, detail="File too large")
+                decoder.decode(chunk)
+                await out.write(chunk)
+        decoder.decode(b"", final=True)
         
         # Create novel in MongoDB
+        now = datetime.utcnow()
         novel_data = {
             "title": title or file.filename,
             "author": author,
-            "created_at": datetime.utcnow(),
-            "last_updated": datetime.utcnow()
+            "created_at": now,
+            "last_updated": now
         }
         
         db_novel = await NovelOperations.create_novel(novel_data)
         
         # Add background task to process content
-        background_tasks.add_task(process_novel_async, str(db_novel.id), content_str)
+        background_tasks.add_task(process_novel_file_async, str(db_novel.id), upload_path)
         
         return FileUploadResponse(
             filename=file.filename,
-            size=file.size or 0,
+            size=size,
             message="Novel uploaded successfully",
             novel_id=str(db_novel.id)
         )
     except HTTPException:
+        _remove_upload(upload_path)
         raise
+    except UnicodeDecodeError:
+        _remove_upload(upload_path)
+        raise HTTPException(status_code=400, detail="File is not valid UTF-8 text")
     except Exception as e:
+        _remove_upload(upload_path)
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
-@app.post("/api/chapters/{chapter_id}/summarize", response_model=ChapterSummaryResponse)
+@router.post("/chapters/{chapter_id}/summarize", response_model=ChapterSummaryResponse)
 async def summarize_chapter(
     chapter_id: str,
     request: ChapterSummaryRequest
@@ -554,51 +335,33 @@ async def summarize_chapter(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
-@app.get("/api/novels/{novel_id}/characters", response_model=List[CharacterResponse])
+@router.get("/novels/{novel_id}/characters", response_model=List[CharacterResponse])
 async def get_characters(novel_id: str):
     """Get all characters for a novel"""
     try:
-        # Verify novel exists
-        novel = await get_novel_by_id(novel_id)
-        if not novel:
+        # Verify the novel exists (usually a cache hit), then read its characters
+        characters = await get_novel_characters_if_exists(novel_id)
+        if characters is None:
             raise HTTPException(status_code=404, detail="Novel not found")
         
-        characters = await get_characters_by_novel_id(novel_id)
-        
-        return [
-            CharacterResponse(
-                id=str(character.id),
-                novel_id=character.novel_id,
-                name=character.name,
-                description=character.description,
-                character_type=character.character_type,
-                first_appearance_chapter=character.first_appearance_chapter,
-                relationships=character.relationships,
-                key_traits=character.key_traits,
-                mentions_count=character.mentions_count,
-                chapters_appeared=character.chapters_appeared
-            )
-            for character in characters
-        ]
+        return [CharacterResponse.from_db(character) for character in characters]
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting characters: {str(e)}")
 
-@app.post("/api/novels/{novel_id}/chat", response_model=ChatResponse)
+@router.post("/novels/{novel_id}/chat", response_model=ChatResponse)
 async def chat_about_novel(
     novel_id: str,
     request: ChatRequest
 ):
     """Interactive chat about the novel"""
     try:
-        novel = await get_novel_by_id(novel_id)
-        if not novel:
+        # Get some chapter content for context (cached per novel)
+        chat_context = await get_chat_context(novel_id)
+        if chat_context is None:
             raise HTTPException(status_code=404, detail="Novel not found")
-        
-        # Get some chapter content for context
-        chapters = await get_chapters_by_novel_id(novel_id, limit=5)
-        context_content = "\n\n".join([f"Chapter {ch.chapter_number}: {ch.title}\n{ch.summary or ch.content[:500]}" for ch in chapters])
+        context_content, chapters_used = chat_context
         
         response_data = await openrouter_client.chat_about_story(
             question=request.message,
@@ -610,7 +373,7 @@ async def chat_about_novel(
             novel_id=novel_id,
             user_message=request.message,
             assistant_response=response_data.get("response", ""),
-            context_used={"chapters_used": len(chapters)},
+            context_used={"chapters_used": chapters_used},
             created_at=datetime.utcnow()
         )
         await chat_record.insert()
@@ -626,10 +389,10 @@ async def chat_about_novel(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in chat: {str(e)}")
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    """Serve the frontend application"""
-    return """
+app.include_router(router)
+
+# Landing page, encoded once at import and served with an ETag
+_ROOT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -685,36 +448,101 @@ async def read_root():
     </body>
     </html>
     """
+_ROOT_HTML_BYTES = _ROOT_HTML.encode("utf-8")
+_ROOT_HTML_ETAG = f'"{hashlib.md5(_ROOT_HTML_BYTES, usedforsecurity=False).hexdigest()}"'
+_ROOT_HTML_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": _ROOT_HTML_ETAG}
+
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    """Serve the frontend application"""
+    if request.headers.get("if-none-match") == _ROOT_HTML_ETAG:
+        return Response(status_code=304, headers=_ROOT_HTML_HEADERS)
+    return Response(content=_ROOT_HTML_BYTES, media_type="text/html", headers=_ROOT_HTML_HEADERS)
 
 async def process_novel_async(novel_id: str, content: str):
     """Background task to process uploaded novel"""
     try:
-        # Split content into chapters
-        chapters_data = nlp_processor.split_into_chapters(content, f"Novel {novel_id}")
+        # Split content into chapters; this scans the whole novel, so keep it off the event loop
+        chapters_data = await asyncio.to_thread(
+            nlp_processor.split_into_chapters, content, f"Novel {novel_id}"
+        )
         
-        # Create chapters in MongoDB
+        # Create chapters in MongoDB in batches
+        now = datetime.utcnow()
+        chapters = []
         for i, chapter_data in enumerate(chapters_data):
-            chapter = Chapter(
+            chapter_text = chapter_data.get("content", "")
+            chapters.append(Chapter(
                 novel_id=novel_id,
                 title=chapter_data.get("title", f"Chapter {i+1}"),
                 chapter_number=i+1,
-                content=chapter_data.get("content", ""),
-                word_count=len(chapter_data.get("content", "").split()),
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            await chapter.insert()
+                content=chapter_text,
+                word_count=len(chapter_text.split()),
+                created_at=now,
+                updated_at=now
+            ))
+        
+        if settings.mongodb_bulk_insert:
+            for start in range(0, len(chapters), CHAPTER_INSERT_BATCH_SIZE):
+                await Chapter.insert_many(chapters[start:start + CHAPTER_INSERT_BATCH_SIZE])
+                # A chat arriving mid-import must not keep the context built from earlier batches
+                invalidate_chat_context(novel_id)
+        else:
+            # insert_many skips Beanie's per-document event hooks; insert one by one, concurrently
+            semaphore = asyncio.Semaphore(CHAPTER_INSERT_CONCURRENCY)
+            
+            async def insert_chapter(chapter: Chapter):
+                async with semaphore:
+                    await chapter.insert()
+            
+            await asyncio.gather(*(insert_chapter(chapter) for chapter in chapters))
+            invalidate_chat_context(novel_id)
+        await ChapterOperations.refresh_novel_counters(novel_id)
         
         print(f"✅ Processed {len(chapters_data)} chapters for novel {novel_id}")
         
     except Exception as e:
         print(f"❌ Error processing novel {novel_id}: {e}")
 
-def safe_parse_analysis_data(analysis_data_raw: Optional[Dict[str, Any]]) -> Optional[AnalysisData]:
+async def process_novel_file_async(novel_id: str, upload_path: str):
+    """Background task to decode a spooled upload and process it"""
+    try:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        parts = []
+        async with aiofiles.open(upload_path, "rb") as f:
+            while chunk := await f.read(UPLOAD_CHUNK_SIZE):
+                parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+    except Exception as e:
+        print(f"❌ Error reading upload for novel {novel_id}: {e}")
+        return
+    finally:
+        _remove_upload(upload_path)
+    
+    await process_novel_async(novel_id, "".join(parts))
+
+def _remove_upload(upload_path: str):
+    """Delete a spooled upload, ignoring files that are already gone"""
+    try:
+        os.remove(upload_path)
+    except FileNotFoundError:
+        pass
+
+def safe_parse_analysis_data(
+    analysis_data_raw: Optional[Dict[str, Any]],
+    validated: bool = False
+) -> Optional[AnalysisData]:
     """Safely parse analysis data with error handling"""
     if not analysis_data_raw:
         return None
     
+    # Analysis validated on write only needs its models rebuilding
+    if validated:
+        return construct_trusted(AnalysisData, analysis_data_raw)
+    
+    # Otherwise analysis_data is free-form LLM output stored as a dict, so it
+    # still needs validating: model_construct would leave the nested sections
+    # as raw dicts instead of their models.
     try:
         return AnalysisData.model_validate(analysis_data_raw)
     except Exception as e:
@@ -726,13 +554,17 @@ def run_server(
     host_override=None, 
     port_override=None, 
     debug_override=None, 
-    reload_override=None
+    reload_override=None,
+    workers_override=None
 ):
     """Run the FastAPI server"""
+    reload = reload_override if reload_override is not None else settings.debug
     uvicorn.run(
         "src.novel_companion.api.main:app",
         host=host_override or settings.host,
         port=port_override or settings.port,
-        reload=reload_override if reload_override is not None else settings.debug,
+        reload=reload,
+        # uvicorn ignores workers when reloading, so only fan out without reload
+        workers=None if reload else (workers_override or settings.server_workers),
         log_level="debug" if (debug_override or settings.debug) else "info"
     ) 
\ No newline at end of file
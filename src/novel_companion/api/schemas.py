@@ -0,0 +1,351 @@
+"""
+Pydantic request and response models for the Novel Companion AI API
+"""
+
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional, Dict, Any, ClassVar, Tuple, Type, TypeVar, Union, get_args, get_origin
+from datetime import datetime
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class APIModel(BaseModel):
+    """Base for API request and response models"""
+
+
+class NovelCreateRequest(APIModel):
+    """Request model for creating a novel"""
+    title: str = Field(..., min_length=1, max_length=200)
+    author: Optional[str] = Field(None, max_length=100)
+    description: Optional[str] = Field(None, max_length=1000)
+    content: str = Field(..., min_length=100)
+
+class NovelResponse(APIModel):
+    """Response model for novel data"""
+    id: str
+    title: str
+    author: Optional[str] = None
+    description: Optional[str] = None
+    genres: List[str] = []
+    tags: List[str] = []
+    average_rating: Optional[float] = None
+    vote_count: Optional[int] = None
+    year: Optional[int] = None
+    status_in_coo: Optional[str] = None
+    created_at: datetime
+    last_updated: datetime
+    
+    # Fields copied as-is from the Novel document
+    db_fields: ClassVar[Tuple[str, ...]] = (
+        "title", "author", "description", "genres", "tags", "average_rating",
+        "vote_count", "year", "status_in_coo", "created_at", "last_updated",
+    )
+    
+    @classmethod
+    def from_db(cls, novel: Any) -> "NovelResponse":
+        """Build a response from a Novel document, which Beanie validated on insert"""
+        return cls.model_construct(id=str(novel.id), **{f: getattr(novel, f) for f in cls.db_fields})
+
+# Detailed models for chapter analysis data
+class ChapterMetadata(APIModel):
+    """Chapter metadata model"""
+    novel_id: Optional[str] = None
+    chapter_id: Optional[str] = None
+    novel_title: Optional[str] = None
+    chapter_number: Optional[int] = None
+    chapter_title: Optional[str] = None
+    word_count: Optional[int] = None
+    estimated_reading_time: Optional[int] = None
+
+class EmotionalArc(APIModel):
+    """Emotional arc model"""
+    emotion: Optional[str] = None
+    intensity: Optional[float] = None
+
+class CharacterSentiment(APIModel):
+    """Character sentiment model"""
+    dominant_emotions: Optional[List[str]] = []
+    emotional_state: Optional[str] = None
+
+class SentimentAnalysis(APIModel):
+    """Sentiment analysis model"""
+    overall_tone: Optional[str] = None
+    emotional_arc: Optional[List[EmotionalArc]] = []
+    character_sentiments: Optional[Dict[str, CharacterSentiment]] = {}
+
+class ChapterSummary(APIModel):
+    """Chapter summary model"""
+    concise: Optional[str] = None
+    detailed: Optional[str] = None
+    key_events: Optional[List[str]] = []
+
+class Theme(APIModel):
+    """Theme model"""
+    theme: Optional[str] = None
+    relevance: Optional[float] = None
+    evidence: Optional[str] = None
+
+class Foreshadowing(APIModel):
+    """Foreshadowing model"""
+    text: Optional[str] = None
+    significance: Optional[str] = None
+
+class Symbolism(APIModel):
+    """Symbolism model"""
+    symbol: Optional[str] = None
+    meaning: Optional[str] = None
+
+class LiteraryElements(APIModel):
+    """Literary elements model"""
+    narrative_voice: Optional[str] = None
+    foreshadowing: Optional[List[Foreshadowing]] = []
+    symbolism: Optional[List[Symbolism]] = []
+
+class ChapterAnalysis(APIModel):
+    """Chapter analysis model"""
+    metadata: Optional[ChapterMetadata] = None
+    summary: Optional[ChapterSummary] = None
+    sentiment_analysis: Optional[SentimentAnalysis] = None
+    themes: Optional[List[Theme]] = []
+    literary_elements: Optional[LiteraryElements] = None
+
+class CharacterProfile(APIModel):
+    """Character profile model"""
+    name: Optional[str] = None
+    role: Optional[str] = None
+    first_appearance: Optional[str] = None
+    description: Optional[str] = None
+    key_traits: Optional[List[str]] = []
+    quotes: Optional[List[str]] = []
+    development_status: Optional[str] = None
+
+class Relationship(APIModel):
+    """Character relationship model"""
+    characters: Optional[List[str]] = []
+    relationship_type: Optional[str] = None
+    dynamics: Optional[str] = None
+    significance: Optional[str] = None
+    interaction_count: Optional[int] = None
+    sentiment: Optional[str] = None
+
+class CharacterMapping(APIModel):
+    """Character mapping model"""
+    characters: Optional[List[CharacterProfile]] = []
+    relationships: Optional[List[Relationship]] = []
+
+class ChapterContext(APIModel):
+    """Chapter context model"""
+    setting: Optional[str] = None
+    timeline_position: Optional[str] = None
+    narrative_importance: Optional[str] = None
+
+class InteractiveCompanion(APIModel):
+    """Interactive companion model"""
+    chapter_context: Optional[ChapterContext] = None
+    key_question: Optional[List[str]] = []
+    suggested_discussion_point: Optional[List[str]] = []
+
+class ComplexityMetrics(APIModel):
+    """Complexity metrics model"""
+    readability_score: Optional[int] = None
+    vocabulary_level: Optional[str] = None
+    structural_complexity: Optional[str] = None
+
+class PacingShift(APIModel):
+    """Pacing shift model"""
+    position: Optional[str] = None
+    change: Optional[str] = None
+
+class PacingAnalysis(APIModel):
+    """Pacing analysis model"""
+    overall_pace: Optional[str] = None
+    significant_shifts: Optional[List[PacingShift]] = []
+
+class EngagementFactors(APIModel):
+    """Engagement factors model"""
+    hook: Optional[List[str]] = []
+    engagement_score: Optional[float] = None
+
+class ReadingAnalytics(APIModel):
+    """Reading analytics model"""
+    complexity_metrics: Optional[ComplexityMetrics] = None
+    complexity_metric: Optional[ComplexityMetrics] = None  # Handle both field names
+    pacing_analysis: Optional[PacingAnalysis] = None
+    engagement_factors: Optional[EngagementFactors] = None
+    
+    model_config = ConfigDict(extra='allow')
+
+class AnalysisData(APIModel):
+    """Complete analysis data model"""
+    chapter_analysis: Optional[ChapterAnalysis] = None
+    character_mapping: Optional[CharacterMapping] = None
+    interactive_companion: Optional[InteractiveCompanion] = None
+    reading_analytics: Optional[ReadingAnalytics] = None
+    
+    model_config = ConfigDict(extra='allow', populate_by_name=True)
+
+class ChapterResponse(APIModel):
+    """Response model for chapter data"""
+    id: str
+    novel_id: str
+    title: str
+    chapter_number: int
+    content: Optional[str] = None  # Optional in response, might be too large
+    summary: Optional[str] = None
+    analysis_data: Optional[AnalysisData] = None
+    key_events: List[str] = []
+    characters_mentioned: List[str] = []
+    themes: List[str] = []
+    sentiment_score: Optional[float] = None
+    word_count: Optional[int] = None
+    reading_time_minutes: Optional[int] = None
+    is_processed: bool = False
+    processing_timestamp: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    # Fields copied as-is from the Chapter document; content and analysis_data are passed in
+    db_fields: ClassVar[Tuple[str, ...]] = (
+        "novel_id", "title", "chapter_number", "summary", "key_events",
+        "characters_mentioned", "themes", "sentiment_score", "word_count",
+        "reading_time_minutes", "is_processed", "processing_timestamp",
+        "created_at", "updated_at",
+    )
+    
+    @classmethod
+    def from_db(
+        cls,
+        chapter: Any,
+        include_content: bool = True,
+        analysis_data: Optional[AnalysisData] = None
+    ) -> "ChapterResponse":
+        """Build a response from a Chapter document, which Beanie validated on insert"""
+        return cls.model_construct(
+            id=str(chapter.id),
+            content=chapter.content if include_content else None,
+            analysis_data=analysis_data,
+            **{f: getattr(chapter, f) for f in cls.db_fields}
+        )
+
+class CharacterResponse(APIModel):
+    """Response model for character data"""
+    id: str
+    novel_id: str
+    name: str
+    description: Optional[str] = None
+    character_type: Optional[str] = None
+    first_appearance_chapter: Optional[int] = None
+    relationships: List[Dict[str, str]] = []
+    key_traits: List[str] = []
+    mentions_count: int = 0
+    chapters_appeared: List[int] = []
+    
+    # Fields copied as-is from the Character document
+    db_fields: ClassVar[Tuple[str, ...]] = (
+        "novel_id", "name", "description", "character_type", "first_appearance_chapter",
+        "relationships", "key_traits", "mentions_count", "chapters_appeared",
+    )
+    
+    @classmethod
+    def from_db(cls, character: Any) -> "CharacterResponse":
+        """Build a response from a Character document, which Beanie validated on insert"""
+        return cls.model_construct(id=str(character.id), **{f: getattr(character, f) for f in cls.db_fields})
+
+class ChapterSummaryRequest(APIModel):
+    """Request model for chapter summarization"""
+    summary_length: Optional[str] = Field("medium", pattern="^(short|medium|long)$")
+
+class ChapterSummaryResponse(APIModel):
+    """Response model for chapter summarization"""
+    chapter_id: str
+    summary: str
+    key_events: List[str]
+    characters_mentioned: List[str]
+
+class ChatRequest(APIModel):
+    """Chat request model"""
+    message: str = Field(..., min_length=1, max_length=1000)
+
+class ChatResponse(APIModel):
+    """Chat response model"""
+    response: str
+    references: List[str] = []
+    suggested_questions: List[str] = []
+
+class FileUploadResponse(APIModel):
+    """File upload response"""
+    filename: str
+    size: int
+    message: str
+    novel_id: Optional[str] = None
+
+
+def construct_trusted(model: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """Build a model and its nested models from already-validated data without re-validating"""
+    values = {}
+    for name, value in data.items():
+        field = model.model_fields.get(name)
+        values[name] = _construct_value(field.annotation, value) if field else value
+    return model.model_construct(**values)
+
+def _construct_value(annotation: Any, value: Any) -> Any:
+    """Rebuild nested models inside Optional/List/Dict annotations"""
+    if value is None:
+        return None
+    origin = get_origin(annotation)
+    if origin is Union:
+        inner = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _construct_value(inner[0], value) if len(inner) == 1 else value
+    if origin is list and isinstance(value, list):
+        (item,) = get_args(annotation)
+        return [_construct_value(item, v) for v in value]
+    if origin is dict and isinstance(value, dict):
+        _, item = get_args(annotation)
+        return {k: _construct_value(item, v) for k, v in value.items()}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        return construct_trusted(annotation, value)
+    return value
+
+def normalize_analysis_data(analysis_data_raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Validate raw LLM analysis once at write time, returning its normalized form or None if invalid"""
+    try:
+        return AnalysisData.model_validate(analysis_data_raw).model_dump(exclude_unset=True)
+    except Exception:
+        return None
+
+
+__all__ = [
+    "APIModel",
+    "NovelCreateRequest",
+    "NovelResponse",
+    "ChapterMetadata",
+    "EmotionalArc",
+    "CharacterSentiment",
+    "SentimentAnalysis",
+    "ChapterSummary",
+    "Theme",
+    "Foreshadowing",
+    "Symbolism",
+    "LiteraryElements",
+    "ChapterAnalysis",
+    "CharacterProfile",
+    "Relationship",
+    "CharacterMapping",
+    "ChapterContext",
+    "InteractiveCompanion",
+    "ComplexityMetrics",
+    "PacingShift",
+    "PacingAnalysis",
+    "EngagementFactors",
+    "ReadingAnalytics",
+    "AnalysisData",
+    "ChapterResponse",
+    "CharacterResponse",
+    "ChapterSummaryRequest",
+    "ChapterSummaryResponse",
+    "ChatRequest",
+    "ChatResponse",
+    "FileUploadResponse",
+    "construct_trusted",
+    "normalize_analysis_data",
+]
@@ -3,6 +3,8 @@ Configuration management for Novel Companion AI
 """
 
 import os
+from dataclasses import make_dataclass
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -19,15 +21,28 @@ class Settings(BaseSettings):
     host: str = "localhost"
     port: int = 8000
     debug: bool = True
+    workers: Optional[int] = None  # Defaults to the CPU count when debug is off
     
     # Database Configuration (SQLite - legacy)
     database_url: str = "sqlite:///./novel_companion.db"
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_recycle: int = 1800  # Seconds before a pooled connection is replaced
+    async_database_url: Optional[str] = None  # Defaults to database_url with an async driver
     
     # MongoDB Configuration
     mongodb_url: str = "mongodb://localhost:27017"
     mongodb_database: str = "novel_companion"
     mongodb_novels_collection: str = "novels"
     mongodb_chapters_collection: str = "chapters"
+    mongodb_llm_cache_collection: str = "llm_cache"
+    mongodb_max_pool_size: int = 50  # Per worker process
+    mongodb_min_pool_size: int = 10
+    mongodb_max_idle_time_ms: int = 30000
+    mongodb_wait_queue_timeout_ms: int = 2000
+    mongodb_compressors: str = "zlib"  # zstd/snappy also need the zstandard/python-snappy packages
+    mongodb_zlib_compression_level: int = 3
+    mongodb_bulk_insert: bool = True  # Disable to insert documents one at a time so Beanie event hooks run
     
     # File Upload Configuration
     max_file_size: int = 10 * 1024 * 1024  # 10MB
@@ -46,10 +61,51 @@ class Settings(BaseSettings):
     max_chat_history: int = 50
     default_model: str = "openai/gpt-3.5-turbo"
     
+    @property
+    def allowed_file_types_set(self) -> frozenset[str]:
+        """Allowed upload extensions, lowercased and without dots"""
+        return frozenset(
+            ext.strip().lstrip(".").lower() for ext in self.allowed_file_types.split(",") if ext.strip()
+        )
+    
+    @property
+    def server_workers(self) -> int:
+        """Number of uvicorn worker processes to run"""
+        if self.workers:
+            return self.workers
+        # Each worker opens its own database connection pools, so size pools per worker
+        return 1 if self.debug else (os.cpu_count() or 1)
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
+# Settings are read once, then frozen into a slotted dataclass: attribute reads on the
+# hot path become plain slot lookups instead of going through the Pydantic model.
+# Derived values (the properties above) are resolved into fields at the same time.
+_DERIVED_FIELDS = {
+    "allowed_file_types_set": frozenset,
+    "server_workers": int,
+}
+
+ResolvedSettings = make_dataclass(
+    "ResolvedSettings",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()]
+    + list(_DERIVED_FIELDS.items()),
+    frozen=True,
+    slots=True,
+)
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> ResolvedSettings:
+    """Load settings from the environment once and return the frozen snapshot"""
+    source = Settings()
+    values = source.model_dump()
+    values.update({name: getattr(source, name) for name in _DERIVED_FIELDS})
+    return ResolvedSettings(**values)
+
+
 # Global settings instance
-settings = Settings() 
\ No newline at end of file
+settings = get_settings() 
\ No newline at end of file
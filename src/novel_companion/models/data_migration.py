@@ -2,54 +2,236 @@
 Data migration utilities for importing novel data into MongoDB
 """
 
-import json
 import asyncio
-from datetime import datetime
+import fnmatch
+import os
+import re
 from pathlib import Path
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Type
+import aiofiles
+import orjson
+from beanie import Document
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError
 
 from .mongodb_models import Novel, Chapter, Character
 from .mongodb_connection import connect_to_mongodb, disconnect_from_mongodb
+from .mongodb_operations import ChapterOperations
+
+# Documents per insert_many command
+INSERT_BATCH_SIZE = 1000
+
+
+def _print_errors(errors: List[str]) -> None:
+    """Print per-record errors collected during a bulk step in a single write"""
+    if errors:
+        print("\n".join(f"❌ {error}" for error in errors))
+
+
+async def _insert_many(model: Type[Document], documents: List[Document], fast: bool = False) -> List[str]:
+    """Bulk insert documents in batches, returning the ids of those inserted
+
+    With fast=True writes are unacknowledged (w=0): much higher throughput, but
+    server-side failures such as duplicate keys go unreported.
+    """
+    collection = model.get_motor_collection()
+    if fast:
+        collection = collection.with_options(write_concern=WriteConcern(w=0))
+    
+    inserted_ids = []
+    for start in range(0, len(documents), INSERT_BATCH_SIZE):
+        # PyMongo assigns each dict its _id client-side, so ids are known even for w=0
+        docs = [
+            document.model_dump(by_alias=True, exclude={"id", "revision_id"})
+            for document in documents[start:start + INSERT_BATCH_SIZE]
+        ]
+        failed = set()
+        try:
+            await collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            failed.update(error["index"] for error in write_errors)
+            _print_errors([
+                f"Failed to insert {model.__name__} #{start + error['index'] + 1}: {error.get('errmsg')}"
+                for error in write_errors
+            ])
+        inserted_ids.extend(str(doc["_id"]) for i, doc in enumerate(docs) if i not in failed)
+        # Progress once per batch rather than per document
+        if len(documents) > INSERT_BATCH_SIZE:
+            print(f"⏳ {model.__name__}: {start + len(docs)}/{len(documents)} processed")
+    return inserted_ids
+
+
+async def _find_orphans(model: Type[Document], projection: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Find documents whose novel_id doesn't match any novel"""
+    return await model.get_motor_collection().aggregate([
+        {"$lookup": {
+            "from": Novel.Settings.name,
+            # novel_id is stored as a string; malformed ids convert to null and never match
+            "let": {"novel_id": {"$convert": {
+                "input": "$novel_id", "to": "objectId", "onError": None, "onNull": None
+            }}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$novel_id"]}}},
+                {"$project": {"_id": 1}}
+            ],
+            "as": "novel"
+        }},
+        {"$match": {"novel": {"$size": 0}}},
+        {"$project": projection}
+    ]).to_list(length=None)
+
+
+# Maximum number of chapter files open at once
+FILE_READ_CONCURRENCY = 64
+
+# Bytes of exported JSON buffered in memory between file writes
+EXPORT_FLUSH_SIZE = 1 << 20
+
+
+def _list_chapter_files(directory: Path, pattern: str) -> List[Path]:
+    """List the files under directory matching a glob pattern, sorted"""
+    if '**' in pattern or '/' in pattern or os.sep in pattern:
+        # Patterns spanning directories need the full glob walk
+        return sorted(path for path in directory.glob(pattern) if path.is_file())
+    # Single-level patterns: scandir entries carry their file type, so there's no stat call per entry
+    name_re = re.compile(fnmatch.translate(pattern))
+    with os.scandir(directory) as entries:
+        return sorted(
+            Path(entry.path) for entry in entries
+            if name_re.match(entry.name) and entry.is_file()
+        )
+
+
+def _decode_text(data: bytes) -> str:
+    """Decode a UTF-8 file read in binary mode, normalizing newlines like text mode"""
+    # One decode of the whole buffer instead of TextIOWrapper's 8 KB chunks
+    text = data.decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _build_chapter(novel_id: str, number: int, chapter_file: Path, content: str) -> Chapter:
+    """Build an unprocessed chapter from a text file's content"""
+    # Extract title from filename or content
+    title = chapter_file.stem.replace('_', ' ').title()
+    if content.startswith('#'):
+        # Try to extract title from first line if it's a header
+        first_line = content.split('\n')[0]
+        if first_line.startswith('#'):
+            title = first_line.strip('#').strip()
+            content = '\n'.join(content.split('\n')[1:]).strip()
+    
+    # Calculate word count
+    word_count = len(content.split())
+    reading_time = max(1, word_count // 200)  # Assume 200 words per minute
+    
+    return Chapter(
+        novel_id=novel_id,
+        title=title,
+        chapter_number=number,
+        content=content,
+        word_count=word_count,
+        reading_time_minutes=reading_time,
+        is_processed=False
+    )
+
+
+# Sample data for create_sample_data; read-only so one call can't leak changes into the next
+SAMPLE_NOVEL = MappingProxyType({
+    "title": "Sample Fantasy Novel",
+    "type": "Web Novel",
+    "original_language": "English",
+    "author": "Sample Author",
+    "description": "A sample fantasy novel for testing the MongoDB setup.",
+    "genres": ("Fantasy", "Adventure", "Magic"),
+    "tags": ("Magic System", "Heroes", "Quest"),
+    "average_rating": 4.5,
+    "vote_count": 100,
+    "year": 2024,
+    "status_in_coo": "Ongoing",
+    "is_completely_translated": True
+})
+
+SAMPLE_CHAPTERS = (
+    MappingProxyType({
+        "title": "The Beginning",
+        "chapter_number": 1,
+        "content": "In a world where magic flows like rivers and heroes are born from legends...",
+        "word_count": 2500,
+        "reading_time_minutes": 13,
+        "key_events": ("Hero's introduction", "Magic discovery"),
+        "characters_mentioned": ("Alex", "Mentor"),
+        "is_processed": True
+    }),
+    MappingProxyType({
+        "title": "First Trial",
+        "chapter_number": 2,
+        "content": "The first trial tested not just strength, but the hero's resolve...",
+        "word_count": 3000,
+        "reading_time_minutes": 15,
+        "key_events": ("First trial", "New abilities"),
+        "characters_mentioned": ("Alex", "Trial Master"),
+        "is_processed": True
+    }),
+)
+
+SAMPLE_CHARACTERS = (
+    MappingProxyType({
+        "name": "Alex",
+        "description": "The protagonist, a young mage discovering their powers",
+        "character_type": "protagonist",
+        "first_appearance_chapter": 1,
+        "key_traits": ("brave", "curious", "magical talent"),
+        "mentions_count": 15,
+        "chapters_appeared": (1, 2)
+    }),
+    MappingProxyType({
+        "name": "Mentor",
+        "description": "Wise old wizard who guides Alex",
+        "character_type": "supporting",
+        "first_appearance_chapter": 1,
+        "key_traits": ("wise", "experienced", "patient"),
+        "mentions_count": 8,
+        "chapters_appeared": (1,)
+    }),
+)
 
 
 class DataMigration:
     """Data migration utilities"""
     
     @staticmethod
-    async def import_novels_from_json(json_file_path: str) -> List[str]:
-        """Import novels from JSON file"""
-        imported_ids = []
-        
+    async def import_novels_from_json(json_file_path: str, fast_insert: bool = False) -> List[str]:
+        """Import novels from JSON file (fast_insert uses unacknowledged writes)"""
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as file:
-                novels_data = json.load(file)
+            with open(json_file_path, 'rb') as file:
+                novels_data = orjson.loads(file.read())
             
             if not isinstance(novels_data, list):
                 novels_data = [novels_data]
             
+            novels = []
+            errors = []
             for novel_data in novels_data:
                 try:
                     # Remove MongoDB ObjectId() placeholder if present
                     if '_id' in novel_data:
                         del novel_data['_id']
                     
-                    # Convert ISODate strings to datetime objects
-                    if 'lastUpdated' in novel_data:
-                        if isinstance(novel_data['lastUpdated'], str):
-                            novel_data['lastUpdated'] = datetime.fromisoformat(
-                                novel_data['lastUpdated'].replace('Z', '+00:00')
-                            )
-                    
-                    # Create novel
-                    novel = Novel(**novel_data)
-                    saved_novel = await novel.insert()
-                    imported_ids.append(str(saved_novel.id))
-                    
-                    print(f"✅ Imported novel: {novel_data.get('title', 'Unknown')}")
+                    # ISO lastUpdated strings (including a Z suffix) are parsed by the
+                    # datetime field's validator
+                    novels.append(Novel(**novel_data))
                     
                 except Exception as e:
-                    print(f"❌ Failed to import novel {novel_data.get('title', 'Unknown')}: {e}")
+                    errors.append(f"Failed to import novel {novel_data.get('title', 'Unknown')}: {e}")
                     continue
+            _print_errors(errors)
+            
+            # Unordered bulk insert; one failure doesn't stop the rest
+            imported_ids = await _insert_many(Novel, novels, fast=fast_insert)
             
             print(f"\n✅ Import completed. {len(imported_ids)} novels imported successfully.")
             return imported_ids
@@ -62,57 +244,47 @@ class DataMigration:
     async def import_chapters_from_text_files(
         novel_id: str, 
         chapters_directory: str,
-        chapter_pattern: str = "chapter_*.txt"
+        chapter_pattern: str = "chapter_*.txt",
+        fast_insert: bool = False
     ) -> List[str]:
-        """Import chapters from text files"""
-        imported_ids = []
+        """Import chapters from text files (fast_insert uses unacknowledged writes)"""
         chapters_path = Path(chapters_directory)
         
         if not chapters_path.exists():
             print(f"❌ Chapters directory not found: {chapters_directory}")
             return []
         
-        # Find chapter files
-        chapter_files = list(chapters_path.glob(chapter_pattern))
-        chapter_files.sort()  # Sort to maintain order
+        # Find chapter files, sorted to maintain order; the directory walk runs in a
+        # worker thread so slow (e.g. network) filesystems don't stall the event loop
+        chapter_files = await asyncio.to_thread(_list_chapter_files, chapters_path, chapter_pattern)
+        
+        # Read and parse every file concurrently, off the event loop
+        semaphore = asyncio.Semaphore(FILE_READ_CONCURRENCY)
+        errors = []
         
-        for i, chapter_file in enumerate(chapter_files, 1):
+        async def load_chapter(number: int, chapter_file: Path) -> Optional[Chapter]:
             try:
-                with open(chapter_file, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                
-                # Extract title from filename or content
-                title = chapter_file.stem.replace('_', ' ').title()
-                if content.startswith('#'):
-                    # Try to extract title from first line if it's a header
-                    first_line = content.split('\n')[0]
-                    if first_line.startswith('#'):
-                        title = first_line.strip('#').strip()
-                        content = '\n'.join(content.split('\n')[1:]).strip()
-                
-                # Calculate word count
-                word_count = len(content.split())
-                reading_time = max(1, word_count // 200)  # Assume 200 words per minute
-                
-                chapter_data = {
-                    "novel_id": novel_id,
-                    "title": title,
-                    "chapter_number": i,
-                    "content": content,
-                    "word_count": word_count,
-                    "reading_time_minutes": reading_time,
-                    "is_processed": False
-                }
-                
-                chapter = Chapter(**chapter_data)
-                saved_chapter = await chapter.insert()
-                imported_ids.append(str(saved_chapter.id))
-                
-                print(f"✅ Imported chapter {i}: {title}")
-                
+                async with semaphore:
+                    async with aiofiles.open(chapter_file, 'rb') as file:
+                        data = await file.read()
+                return _build_chapter(novel_id, number, chapter_file, _decode_text(data))
             except Exception as e:
-                print(f"❌ Failed to import chapter from {chapter_file}: {e}")
-                continue
+                errors.append(f"Failed to import chapter from {chapter_file}: {e}")
+                return None
+        
+        loaded = await asyncio.gather(*(
+            load_chapter(i, chapter_file) for i, chapter_file in enumerate(chapter_files, 1)
+        ))
+        chapters = [chapter for chapter in loaded if chapter is not None]
+        _print_errors(errors)
+        
+        imported_ids = await _insert_many(Chapter, chapters, fast=fast_insert)
+        if fast_insert:
+            # Unacknowledged writes may not have landed yet, so a recount now could be
+            # short; leave the totals unknown and let the next statistics call backfill them
+            await ChapterOperations.reset_novel_counters(novel_id)
+        else:
+            await ChapterOperations.refresh_novel_counters(novel_id)
         
         print(f"\n✅ Chapter import completed. {len(imported_ids)} chapters imported.")
         return imported_ids
@@ -120,88 +292,17 @@ class DataMigration:
     @staticmethod
     async def create_sample_data() -> Dict[str, Any]:
         """Create sample data for testing"""
-        # Sample novel data
-        sample_novel = {
-            "title": "Sample Fantasy Novel",
-            "type": "Web Novel",
-            "original_language": "English",
-            "author": "Sample Author",
-            "description": "A sample fantasy novel for testing the MongoDB setup.",
-            "genres": ["Fantasy", "Adventure", "Magic"],
-            "tags": ["Magic System", "Heroes", "Quest"],
-            "average_rating": 4.5,
-            "vote_count": 100,
-            "year": 2024,
-            "status_in_coo": "Ongoing",
-            "is_completely_translated": True
-        }
-        
-        # Create novel
-        novel = Novel(**sample_novel)
-        saved_novel = await novel.insert()
+        saved_novel = await Novel(**SAMPLE_NOVEL).insert()
         novel_id = str(saved_novel.id)
         
-        # Sample chapters
-        sample_chapters = [
-            {
-                "novel_id": novel_id,
-                "title": "The Beginning",
-                "chapter_number": 1,
-                "content": "In a world where magic flows like rivers and heroes are born from legends...",
-                "word_count": 2500,
-                "reading_time_minutes": 13,
-                "key_events": ["Hero's introduction", "Magic discovery"],
-                "characters_mentioned": ["Alex", "Mentor"],
-                "is_processed": True
-            },
-            {
-                "novel_id": novel_id,
-                "title": "First Trial",
-                "chapter_number": 2,
-                "content": "The first trial tested not just strength, but the hero's resolve...",
-                "word_count": 3000,
-                "reading_time_minutes": 15,
-                "key_events": ["First trial", "New abilities"],
-                "characters_mentioned": ["Alex", "Trial Master"],
-                "is_processed": True
-            }
-        ]
-        
-        chapter_ids = []
-        for chapter_data in sample_chapters:
-            chapter = Chapter(**chapter_data)
-            saved_chapter = await chapter.insert()
-            chapter_ids.append(str(saved_chapter.id))
-        
-        # Sample characters
-        sample_characters = [
-            {
-                "novel_id": novel_id,
-                "name": "Alex",
-                "description": "The protagonist, a young mage discovering their powers",
-                "character_type": "protagonist",
-                "first_appearance_chapter": 1,
-                "key_traits": ["brave", "curious", "magical talent"],
-                "mentions_count": 15,
-                "chapters_appeared": [1, 2]
-            },
-            {
-                "novel_id": novel_id,
-                "name": "Mentor",
-                "description": "Wise old wizard who guides Alex",
-                "character_type": "supporting",
-                "first_appearance_chapter": 1,
-                "key_traits": ["wise", "experienced", "patient"],
-                "mentions_count": 8,
-                "chapters_appeared": [1]
-            }
-        ]
-        
-        character_ids = []
-        for character_data in sample_characters:
-            character = Character(**character_data)
-            saved_character = await character.insert()
-            character_ids.append(str(saved_character.id))
+        # Chapters and characters only depend on the novel, so insert both collections at once
+        chapter_result, character_result = await asyncio.gather(
+            Chapter.insert_many([Chapter(**data, novel_id=novel_id) for data in SAMPLE_CHAPTERS]),
+            Character.insert_many([Character(**data, novel_id=novel_id) for data in SAMPLE_CHARACTERS])
+        )
+        await ChapterOperations.refresh_novel_counters(novel_id)
+        chapter_ids = [str(chapter_id) for chapter_id in chapter_result.inserted_ids]
+        character_ids = [str(character_id) for character_id in character_result.inserted_ids]
         
         return {
             "novel_id": novel_id,
@@ -215,30 +316,40 @@ class DataMigration:
         """Validate data integrity across collections"""
         issues = []
         
-        # Check for orphaned chapters
-        all_novels = await Novel.find_all().to_list()
-        novel_ids = [str(novel.id) for novel in all_novels]
+        # Orphans are found server-side: join each child to novels and keep the
+        # ones with no match, so only orphan records come over the wire
+        (
+            orphaned_chapters,
+            orphaned_characters,
+            untitled_novels,
+            total_novels,
+            total_chapters,
+            total_characters,
+        ) = await asyncio.gather(
+            _find_orphans(Chapter, {"title": 1}),
+            _find_orphans(Character, {"name": 1}),
+            Novel.get_motor_collection().find(
+                {"$or": [{"title": None}, {"title": ""}]}, {"_id": 1}
+            ).to_list(length=None),
+            Novel.get_motor_collection().count_documents({}),
+            Chapter.get_motor_collection().count_documents({}),
+            Character.get_motor_collection().count_documents({}),
+        )
         
-        all_chapters = await Chapter.find_all().to_list()
-        for chapter in all_chapters:
-            if str(chapter.novel_id) not in novel_ids:
-                issues.append(f"Orphaned chapter: {chapter.title} (ID: {chapter.id})")
+        for chapter in orphaned_chapters:
+            issues.append(f"Orphaned chapter: {chapter.get('title')} (ID: {chapter['_id']})")
         
-        # Check for orphaned characters
-        all_characters = await Character.find_all().to_list()
-        for character in all_characters:
-            if str(character.novel_id) not in novel_ids:
-                issues.append(f"Orphaned character: {character.name} (ID: {character.id})")
+        for character in orphaned_characters:
+            issues.append(f"Orphaned character: {character.get('name')} (ID: {character['_id']})")
         
         # Check for missing required fields
-        for novel in all_novels:
-            if not novel.title:
-                issues.append(f"Novel missing title (ID: {novel.id})")
+        for novel in untitled_novels:
+            issues.append(f"Novel missing title (ID: {novel['_id']})")
         
         return {
-            "total_novels": len(all_novels),
-            "total_chapters": len(all_chapters),
-            "total_characters": len(all_characters),
+            "total_novels": total_novels,
+            "total_chapters": total_chapters,
+            "total_characters": total_characters,
             "issues_found": len(issues),
             "issues": issues
         }
@@ -247,25 +358,24 @@ class DataMigration:
     async def export_novels_to_json(output_file: str) -> bool:
         """Export all novels to JSON file"""
         try:
-            novels = await Novel.find_all().to_list()
-            novels_data = []
-            
-            for novel in novels:
-                novel_dict = novel.dict(by_alias=True)
-                # Convert ObjectId to string
-                novel_dict['_id'] = str(novel.id)
-                # Convert datetime to ISO string
-                if 'lastUpdated' in novel_dict:
-                    novel_dict['lastUpdated'] = novel_dict['lastUpdated'].isoformat()
-                if 'created_at' in novel_dict:
-                    novel_dict['created_at'] = novel_dict['created_at'].isoformat()
-                
-                novels_data.append(novel_dict)
-            
-            with open(output_file, 'w', encoding='utf-8') as file:
-                json.dump(novels_data, file, indent=2, ensure_ascii=False)
+            # Stream novels off the cursor into a JSON array, one document at a time
+            exported = 0
+            buffer = bytearray(b"[\n")
+            async with aiofiles.open(output_file, 'wb') as file:
+                async for novel in Novel.find_all():
+                    if exported:
+                        buffer += b",\n"
+                    # Pydantic encodes the ObjectId and datetimes natively in its core serializer
+                    buffer += novel.model_dump_json(by_alias=True, indent=2).encode("utf-8")
+                    exported += 1
+                    # Each aiofiles write is a thread hand-off, so only flush in large chunks
+                    if len(buffer) >= EXPORT_FLUSH_SIZE:
+                        await file.write(bytes(buffer))
+                        buffer.clear()
+                buffer += b"\n]\n"
+                await file.write(bytes(buffer))
             
-            print(f"✅ Exported {len(novels_data)} novels to {output_file}")
+            print(f"✅ Exported {exported} novels to {output_file}")
             return True
             
         except Exception as e:
@@ -279,7 +389,7 @@ async def run_migration():
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python -m data_migration [import|sample|validate|export]")
+        print("Usage: python -m data_migration [import [--fast]|sample|validate|export]")
         return
     
     command = sys.argv[1]
@@ -289,7 +399,7 @@ async def run_migration():
     try:
         if command == "import" and len(sys.argv) > 2:
             json_file = sys.argv[2]
-            await DataMigration.import_novels_from_json(json_file)
+            await DataMigration.import_novels_from_json(json_file, fast_insert="--fast" in sys.argv[3:])
         
         elif command == "sample":
             result = await DataMigration.create_sample_data()
@@ -2,20 +2,31 @@
 Database models for Novel Companion AI
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy import create_engine, select, Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Float, Boolean, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.orm import sessionmaker, relationship, column_property
+from sqlalchemy.sql import func, literal_column
 from datetime import datetime
 import enum
 
 from ..config import settings
 
 # Database setup
-engine = create_engine(settings.database_url, echo=settings.debug)
+engine = create_engine(
+    settings.database_url,
+    echo=settings.debug,
+    pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+    pool_pre_ping=True,  # Transparently replace connections the server has dropped
+    pool_recycle=settings.database_pool_recycle
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# JSON arrays stored as binary, indexable JSONB on PostgreSQL; plain JSON elsewhere
+JSONList = JSON().with_variant(JSONB(), "postgresql")
+
 
 class NovelStatusEnum(enum.Enum):
     """Novel status enumeration"""
@@ -66,14 +77,20 @@ class Novel(Base):
     # Relationships
     chapters = relationship("Chapter", back_populates="novel", cascade="all, delete-orphan")
     characters = relationship("Character", back_populates="novel", cascade="all, delete-orphan")
-    
-    @property
-    def chapter_count(self):
-        return len(self.chapters)
-    
-    @property
-    def character_count(self):
-        return len(self.characters)
+    analyses = relationship("Analysis", back_populates="novel", cascade="all, delete-orphan")
+
+
+
+def novel_search_vector():
+    """Full-text search vector over a novel's title and author (PostgreSQL)"""
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        Novel.title + literal_column("' '") + func.coalesce(Novel.author, literal_column("''"))
+    )
+
+
+# GIN index backing search_novels on PostgreSQL; other dialects fall back to LIKE
+Index("ix_novel_search", novel_search_vector(), postgresql_using="gin").ddl_if(dialect="postgresql")
 
 
 class Chapter(Base):
@@ -86,8 +103,8 @@ class Chapter(Base):
     content = Column(Text, nullable=False)
     summary = Column(Text, nullable=True)
     chapter_number = Column(Integer, nullable=False)
-    key_events = Column(JSON, nullable=True)  # Store as JSON array
-    characters_mentioned = Column(JSON, nullable=True)  # Store as JSON array
+    key_events = Column(JSONList, nullable=True)  # Store as JSON array
+    characters_mentioned = Column(JSONList, nullable=True)  # Store as JSON array
     analysis_data = Column(JSON, nullable=True)  # Store analysis results as JSON
     themes = Column(JSON, nullable=True)  # Store as JSON array
     sentiment_score = Column(Float, nullable=True)
@@ -98,6 +115,13 @@ class Chapter(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
     
+    # Serves "chapters of a novel ordered by number" straight from the index
+    __table_args__ = (
+        Index("ix_chapter_novel_num", "novel_id", "chapter_number"),
+        # Serves characters_mentioned @> '["name"]' containment lookups
+        Index("ix_chapter_chars_gin", "characters_mentioned", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
     # Relationships
     novel = relationship("Novel", back_populates="chapters")
 
@@ -112,11 +136,16 @@ class Character(Base):
     description = Column(Text, nullable=True)
     character_type = Column(Enum(CharacterTypeEnum), default=CharacterTypeEnum.SUPPORTING)
     first_appearance_chapter = Column(Integer, nullable=True)
-    relationships = Column(JSON, nullable=True)  # Store as JSON array
-    key_traits = Column(JSON, nullable=True)  # Store as JSON array
+    relationships = Column(JSONList, nullable=True)  # Store as JSON array
+    key_traits = Column(JSONList, nullable=True)  # Store as JSON array
     mentions_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Serves "characters of a novel ordered by mentions" straight from the index
+    __table_args__ = (
+        Index("ix_char_novel_mentions", novel_id, mentions_count.desc()),
+    )
+    
     # Relationships
     novel = relationship("Novel", back_populates="characters")
 
@@ -129,7 +158,7 @@ class ChatHistory(Base):
     novel_id = Column(Integer, ForeignKey("novels.id"), nullable=False)
     user_message = Column(Text, nullable=False)
     assistant_response = Column(Text, nullable=False)
-    context_used = Column(JSON, nullable=True)  # Store context references
+    context_used = Column(JSONList, nullable=True)  # Store context references
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -141,8 +170,29 @@ class Analysis(Base):
     novel_id = Column(Integer, ForeignKey("novels.id"), nullable=False)
     analysis_type = Column(String(50), nullable=False)  # themes, plot, style, characters
     results = Column(JSON, nullable=False)  # Store analysis results as JSON
-    insights = Column(JSON, nullable=True)  # Store insights as JSON array
+    insights = Column(JSONList, nullable=True)  # Store insights as JSON array
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+    
+    # One analysis per type per novel; re-running an analysis replaces it
+    __table_args__ = (
+        UniqueConstraint("novel_id", "analysis_type", name="uq_analysis_novel_type"),
+    )
+    
+    # Relationships
+    novel = relationship("Novel", back_populates="analyses")
+
+
+# Child counts computed with COUNT(*) subqueries instead of loading the collections.
+# Deferred: loaded on first access, or with the parent via undefer(Novel.chapter_count).
+Novel.chapter_count = column_property(
+    select(func.count(Chapter.id)).where(Chapter.novel_id == Novel.id).correlate_except(Chapter).scalar_subquery(),
+    deferred=True
+)
+Novel.character_count = column_property(
+    select(func.count(Character.id)).where(Character.novel_id == Novel.id).correlate_except(Character).scalar_subquery(),
+    deferred=True
+)
 
 
 # Database utility functions
@@ -155,6 +205,53 @@ def get_db():
         db.close()
 
 
+def get_pool_status() -> str:
+    """Get a one-line summary of connection pool usage (checked in/out, overflow)"""
+    return engine.pool.status()
+
+
+# Async engine, created on first use so the async drivers are only needed by async callers
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+_async_session_factory = None
+
+
+def get_async_database_url() -> str:
+    """Get the async database URL, swapping database_url's driver for an async one"""
+    if settings.async_database_url:
+        return settings.async_database_url
+    scheme, sep, rest = settings.database_url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    return f"{_ASYNC_DRIVERS.get(backend, scheme)}{sep}{rest}"
+
+
+def get_async_session_factory():
+    """Get the AsyncSession factory, creating the async engine on first call"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_engine = create_async_engine(
+            get_async_database_url(),
+            echo=settings.debug,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_pre_ping=True,
+            pool_recycle=settings.database_pool_recycle
+        )
+        # Keep attributes loaded after commit: lazy refreshes can't happen implicitly under asyncio
+        _async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_session_factory
+
+
+async def get_async_db():
+    """Get async database session"""
+    async with get_async_session_factory()() as db:
+        yield db
+
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
@@ -3,12 +3,16 @@ MongoDB connection and initialization for Novel Companion AI
 """
 
 import asyncio
+from functools import lru_cache
+from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
-from typing import Optional
+from bson import ObjectId
+from typing import Optional, Dict, Any, List, Union, AsyncIterator, Tuple
 
 from ..config import settings
-from .mongodb_models import Novel, Chapter, Character, ChatHistory, Analysis
+from ..services.cache import TTLCache
+from .mongodb_models import Novel, Chapter, Character, ChatHistory, Analysis, ChapterSummaryView
 
 
 class MongoDBManager:
@@ -22,7 +26,7 @@ class MongoDBManager:
         """Connect to MongoDB and initialize Beanie"""
         try:
             # Create MongoDB client
-            self.client = AsyncIOMotorClient(settings.mongodb_url)
+            self.client = self._create_client()
             
             # Get database
             self.database = self.client[settings.mongodb_database]
@@ -34,7 +38,9 @@ class MongoDBManager:
             # Initialize Beanie with document models
             await init_beanie(
                 database=self.database,
-                document_models=[Novel, Chapter, Character, ChatHistory, Analysis]
+                document_models=[Novel, Chapter, Character, ChatHistory, Analysis],
+                # Replaces indexes whose definition changed (e.g. the novel text index)
+                allow_index_dropping=True
             )
             print("✅ Beanie initialized with document models")
             
@@ -42,6 +48,22 @@ class MongoDBManager:
             print(f"❌ Failed to connect to MongoDB: {e}")
             raise
     
+    @staticmethod
+    def _create_client() -> AsyncIOMotorClient:
+        """Create the MongoDB client with the configured pool settings"""
+        # Beanie 1.x only accepts Motor databases. PyMongo's native AsyncMongoClient
+        # avoids Motor's thread-pool hop, but needs Beanie 2.x; once Beanie is upgraded
+        # this is the one place to switch clients.
+        return AsyncIOMotorClient(
+            settings.mongodb_url,
+            maxPoolSize=settings.mongodb_max_pool_size,
+            minPoolSize=settings.mongodb_min_pool_size,
+            maxIdleTimeMS=settings.mongodb_max_idle_time_ms,
+            waitQueueTimeoutMS=settings.mongodb_wait_queue_timeout_ms,
+            compressors=settings.mongodb_compressors,
+            zlibCompressionLevel=settings.mongodb_zlib_compression_level
+        )
+    
     async def disconnect(self):
         """Disconnect from MongoDB"""
         if self.client:
@@ -56,6 +78,14 @@ class MongoDBManager:
         except Exception as e:
             print(f"⚠️ Error creating custom indexes: {e}")
     
+    async def warm_up(self):
+        """Open pooled connections up front so the first requests don't pay for them"""
+        collections = [Novel, Chapter, Character]
+        await asyncio.gather(*(
+            model.get_motor_collection().find_one({}, {"_id": 1}) for model in collections
+        ))
+        print("✅ MongoDB connection pool warmed up")
+    
     async def health_check(self) -> bool:
         """Check if MongoDB connection is healthy"""
         try:
@@ -74,6 +104,7 @@ async def connect_to_mongodb():
     """Connect to MongoDB (use in FastAPI startup)"""
     await mongodb_manager.connect()
     await mongodb_manager.create_indexes()
+    await mongodb_manager.warm_up()
 
 
 async def disconnect_from_mongodb():
@@ -81,13 +112,52 @@ async def disconnect_from_mongodb():
     await mongodb_manager.disconnect()
 
 
+# Novel metadata rarely changes, so lookups by ID are cached per process for a short time.
+# Cached documents are shared between requests: treat them as read-only.
+_novel_cache = TTLCache(maxsize=1024, ttl=60)
+
+
+# Chat prompts reuse the same opening chapters every turn, so the formatted context is cached too
+_chat_context_cache = TTLCache(maxsize=256, ttl=300)
+CHAT_CONTEXT_CHAPTERS = 5
+CHAT_CONTEXT_EXCERPT_CHARS = 500
+
+
+def invalidate_novel_cache(novel_id: str) -> None:
+    """Drop a cached novel after it is updated or deleted"""
+    _novel_cache.pop(str(novel_id))
+    _chat_context_cache.pop(str(novel_id))
+
+
+def invalidate_chat_context(novel_id: str) -> None:
+    """Drop a novel's cached chat context after its chapters change"""
+    _chat_context_cache.pop(str(novel_id))
+
+
+# The same few novel IDs arrive as strings on every request; parse each once.
+# ObjectIds are immutable, so sharing the cached instances is safe.
+@lru_cache(maxsize=4096)
+def _to_object_id(value: str) -> Optional[ObjectId]:
+    """Parse an ID string to an ObjectId, or None if it is malformed"""
+    return ObjectId(value) if ObjectId.is_valid(value) else None
+
+
 # Utility functions for common operations
 async def get_novel_by_id(novel_id: str) -> Optional[Novel]:
     """Get a novel by its ID"""
+    novel = _novel_cache.get(novel_id)
+    if novel is not None:
+        return novel
+    object_id = _to_object_id(novel_id)
+    if object_id is None:
+        return None
     try:
-        return await Novel.get(novel_id)
+        novel = await Novel.get(object_id)
     except Exception:
         return None
+    if novel is not None:
+        _novel_cache.set(novel_id, novel)
+    return novel
 
 
 async def get_novel_by_title(title: str) -> Optional[Novel]:
@@ -95,11 +165,71 @@ async def get_novel_by_title(title: str) -> Optional[Novel]:
     return await Novel.find_one(Novel.title == title)
 
 
-async def get_chapters_by_novel_id(novel_id: str, skip: int = 0, limit: int = 100) -> list[Chapter]:
-    """Get chapters for a specific novel"""
-    return await Chapter.find(
+def _object_ids(ids: List[str]) -> List[ObjectId]:
+    """Convert ID strings to ObjectIds, skipping malformed ones"""
+    object_ids = (_to_object_id(i) for i in ids)
+    return [object_id for object_id in object_ids if object_id is not None]
+
+
+async def get_novels_by_ids(novel_ids: List[str]) -> Dict[str, Novel]:
+    """Get several novels in one query, keyed by ID (cached novels are not re-fetched)"""
+    novels = {}
+    missing = []
+    for novel_id in novel_ids:
+        novel = _novel_cache.get(novel_id)
+        if novel is not None:
+            novels[novel_id] = novel
+        else:
+            missing.append(novel_id)
+    if missing:
+        for novel in await Novel.find({"_id": {"$in": _object_ids(missing)}}).to_list():
+            novel_id = str(novel.id)
+            _novel_cache.set(novel_id, novel)
+            novels[novel_id] = novel
+    return novels
+
+
+async def get_novels_by_titles(titles: List[str]) -> Dict[str, Novel]:
+    """Get several novels in one query, keyed by title"""
+    novels = await Novel.find({"title": {"$in": titles}}).to_list()
+    return {novel.title: novel for novel in novels}
+
+
+async def get_chapters_by_ids(chapter_ids: List[str]) -> Dict[str, Chapter]:
+    """Get several chapters in one query, keyed by ID"""
+    chapters = await Chapter.find({"_id": {"$in": _object_ids(chapter_ids)}}).to_list()
+    return {str(chapter.id): chapter for chapter in chapters}
+
+
+async def get_characters_by_ids(character_ids: List[str]) -> Dict[str, Character]:
+    """Get several characters in one query, keyed by ID"""
+    characters = await Character.find({"_id": {"$in": _object_ids(character_ids)}}).to_list()
+    return {str(character.id): character for character in characters}
+
+
+async def get_chapters_by_novel_id(
+    novel_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    include_content: bool = True
+) -> list[Union[Chapter, ChapterSummaryView]]:
+    """Get chapters for a specific novel, optionally without their content"""
+    return await iter_chapters_by_novel_id(novel_id, skip, limit, include_content).to_list()
+
+
+def iter_chapters_by_novel_id(
+    novel_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    include_content: bool = True
+) -> AsyncIterator[Union[Chapter, ChapterSummaryView]]:
+    """Iterate over chapters for a specific novel from a cursor, without loading them all"""
+    query = Chapter.find(
         Chapter.novel_id == novel_id
-    ).sort("chapter_number").skip(skip).limit(limit).to_list()
+    ).sort("chapter_number").skip(skip).limit(limit)
+    if not include_content:
+        query = query.project(ChapterSummaryView)
+    return query
 
 
 async def get_characters_by_novel_id(novel_id: str) -> list[Character]:
@@ -107,6 +237,72 @@ async def get_characters_by_novel_id(novel_id: str) -> list[Character]:
     return await Character.find(Character.novel_id == novel_id).to_list()
 
 
+async def _lookup_for_novel(novel_id: str, collection: str, pipeline: list) -> Optional[list]:
+    """Fetch a novel's child documents with the novel existence check in the same round trip
+
+    Every child lands in a single result document, which is capped at 16 MB: the
+    pipeline must bound both the number of children ($limit) and their size ($project).
+    """
+    object_id = _to_object_id(novel_id)
+    if object_id is None:
+        return None
+    results = await Novel.get_motor_collection().aggregate([
+        {"$match": {"_id": object_id}},
+        {"$project": {"_sid": {"$toString": "$_id"}}},
+        {"$lookup": {
+            "from": collection,
+            "let": {"novel_id": "$_sid"},
+            "pipeline": [{"$match": {"$expr": {"$eq": ["$novel_id", "$$novel_id"]}}}, *pipeline],
+            "as": "items"
+        }}
+    ]).to_list(length=1)
+    return results[0]["items"] if results else None
+
+
+async def get_novel_characters_if_exists(novel_id: str) -> Optional[list[Character]]:
+    """Get characters for a novel, or None if the novel does not exist
+
+    This is two reads, not one: the existence check goes through the novel cache,
+    then the characters are read from a cursor, since an unbounded character list
+    cannot be embedded in a single $lookup result document.
+    """
+    if await get_novel_by_id(novel_id) is None:
+        return None
+    return await get_characters_by_novel_id(novel_id)
+
+
+async def get_chat_context(novel_id: str) -> Optional[Tuple[str, int]]:
+    """Get the chapter context and chapter count used for chat, or None if the novel does not exist"""
+    cached = _chat_context_cache.get(novel_id)
+    if cached is not None:
+        return cached
+    # Only the opening excerpt of each chapter is used, so trim content server-side
+    chapters = await _lookup_for_novel(novel_id, Chapter.Settings.name, [
+        {"$sort": {"chapter_number": 1}},
+        {"$limit": CHAT_CONTEXT_CHAPTERS},
+        {"$project": {
+            "_id": 0,
+            "chapter_number": 1,
+            "title": 1,
+            "summary": 1,
+            "excerpt": {"$substrCP": [{"$ifNull": ["$content", ""]}, 0, CHAT_CONTEXT_EXCERPT_CHARS]}
+        }}
+    ])
+    if chapters is None:
+        return None
+    context = (
+        "\n\n".join(
+            f"Chapter {ch['chapter_number']}: {ch['title']}\n{ch.get('summary') or ch['excerpt']}"
+            for ch in chapters
+        ),
+        len(chapters)
+    )
+    # A novel still being processed has no chapters yet; don't pin that empty context
+    if chapters:
+        _chat_context_cache.set(novel_id, context)
+    return context
+
+
 async def search_novels(
     query: str = None,
     genres: list[str] = None,
@@ -118,12 +314,15 @@ async def search_novels(
     """Search novels with various filters"""
     filters = []
     
-    if query:
-        # Text search on title and description
-        filters.append({"$text": {"$search": query}})
-    
+    # Text search on title, description and author (novel_text_index). The author is
+    # added as a quoted phrase, which every match must contain, so it is served by the
+    # same index instead of an unanchored regex scan
+    search_terms = [query] if query else []
     if author:
-        filters.append({"author": {"$regex": author, "$options": "i"}})
+        search_terms.append('"{}"'.format(author.replace('"', ' ')))
+    text_search = " ".join(search_terms)
+    if text_search:
+        filters.append({"$text": {"$search": text_search}})
     
     if genres:
         filters.append({"genres": {"$in": genres}})
@@ -134,19 +333,49 @@ async def search_novels(
     # Combine filters
     if filters:
         query_filter = {"$and": filters} if len(filters) > 1 else filters[0]
-        return await Novel.find(query_filter).skip(skip).limit(limit).to_list()
+        novels = Novel.find(query_filter)
+        if text_search:
+            # Rank text matches by relevance, straight from the text index
+            novels = novels.sort([("score", {"$meta": "textScore"})])
+        return await novels.skip(skip).limit(limit).to_list()
     else:
         return await Novel.find_all().skip(skip).limit(limit).to_list()
 
 
+async def get_cached_llm_analysis(key: str) -> Optional[Dict[str, Any]]:
+    """Get a previously computed LLM analysis by its content-hash key"""
+    cached = await mongodb_manager.database[settings.mongodb_llm_cache_collection].find_one({"_id": key})
+    return cached["analysis"] if cached else None
+
+
+async def cache_llm_analysis(key: str, analysis: Dict[str, Any]) -> None:
+    """Store an LLM analysis under its content-hash key (first writer wins)"""
+    await mongodb_manager.database[settings.mongodb_llm_cache_collection].update_one(
+        {"_id": key},
+        {"$setOnInsert": {"analysis": analysis, "created_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+
 # Export main components
 __all__ = [
     "mongodb_manager",
     "connect_to_mongodb", 
     "disconnect_from_mongodb",
     "get_novel_by_id",
+    "invalidate_novel_cache",
+    "invalidate_chat_context",
+    "get_chat_context",
     "get_novel_by_title",
+    "get_novels_by_ids",
+    "get_novels_by_titles",
+    "get_chapters_by_ids",
+    "get_characters_by_ids",
     "get_chapters_by_novel_id",
+    "iter_chapters_by_novel_id",
     "get_characters_by_novel_id",
-    "search_novels"
+    "get_novel_characters_if_exists",
+    "search_novels",
+    "get_cached_llm_analysis",
+    "cache_llm_analysis"
 ] 
\ No newline at end of file
@@ -4,9 +4,9 @@ MongoDB models for Novel Companion AI using Beanie
 
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from beanie import Document, Indexed
+from beanie import Document, Indexed, PydanticObjectId
 from pydantic import BaseModel, Field
-from pymongo import IndexModel, ASCENDING, TEXT
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
 from bson import ObjectId
 from pydantic import ConfigDict
 
@@ -58,6 +58,10 @@ class Novel(Document):
     associated_names: List[str] = Field([], alias="associatedNames")
     related_series: List[RelatedSeries] = Field([], alias="relatedSeries")
     
+    # Denormalized chapter totals, kept current by ChapterOperations; None until first computed
+    chapter_count: Optional[int] = None
+    total_word_count: Optional[int] = None
+    
     # Metadata
     last_updated: datetime = Field(default_factory=datetime.utcnow, alias="lastUpdated")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -65,22 +69,42 @@ class Novel(Document):
     class Settings:
         name = "novels"
         indexes = [
-            IndexModel([("title", TEXT)], name="title_text_index"),
+            # A collection can have only one text index, so it covers every searchable field
+            IndexModel(
+                [("title", TEXT), ("description", TEXT), ("author", TEXT)],
+                name="novel_text_index",
+                weights={"title": 10, "author": 5, "description": 1}
+            ),
             IndexModel([("author", ASCENDING)], name="author_index"),
             IndexModel([("genres", ASCENDING)], name="genres_index"),
             IndexModel([("tags", ASCENDING)], name="tags_index"),
-            IndexModel([("average_rating", ASCENDING)], name="rating_index"),
+            # Aliased fields are stored (and queried) under their alias, so index the alias;
+            # directions match the descending sorts the listings use
+            IndexModel([("averageRating", DESCENDING)], name="rating_desc_index"),
+            IndexModel([("lastUpdated", DESCENDING)], name="last_updated_desc_index"),
             IndexModel([("year", ASCENDING)], name="year_index"),
-            IndexModel([("status_in_coo", ASCENDING)], name="status_index"),
-            IndexModel([("created_at", ASCENDING)], name="created_at_index"),
+            IndexModel([("statusInCOO", ASCENDING)], name="status_index"),
         ]
 
 
+class NovelListItem(BaseModel):
+    """Projection of a novel down to the fields shown in novel listings"""
+    id: PydanticObjectId = Field(alias="_id")
+    title: str
+    author: Optional[str] = None
+    average_rating: Optional[float] = Field(None, alias="averageRating")
+    year: Optional[int] = None
+    last_updated: Optional[datetime] = Field(None, alias="lastUpdated")
+
+    class Settings:
+        projection = {"_id": 1, "title": 1, "author": 1, "averageRating": 1, "year": 1, "lastUpdated": 1}
+
+
 class Chapter(Document):
     """Chapter document model for MongoDB"""
     
     # Basic Information
-    novel_id: Indexed(str)  # Changed to str to avoid ObjectId issues
+    novel_id: str  # Changed to str to avoid ObjectId issues; indexed via novel_chapter_index
     title: str
     chapter_number: int
     
@@ -88,6 +112,7 @@ class Chapter(Document):
     content: str  # The actual chapter text content
     summary: Optional[str] = None
     analysis_data: Optional[Dict[str, Any]] = None # To store the full LLM analysis
+    analysis_data_validated: bool = False  # analysis_data was validated against the API schema on write
     
     # Analysis Results
     key_events: List[str] = []
@@ -110,21 +135,69 @@ class Chapter(Document):
     class Settings:
         name = "chapters"
         indexes = [
-            IndexModel([("novel_id", ASCENDING)], name="novel_id_index"),
-            IndexModel([("chapter_number", ASCENDING)], name="chapter_number_index"),
+            # Also serves novel_id-only queries as its prefix
             IndexModel([("novel_id", ASCENDING), ("chapter_number", ASCENDING)], name="novel_chapter_index", unique=True),
-            IndexModel([("title", TEXT)], name="chapter_title_text_index"),
-            IndexModel([("created_at", ASCENDING)], name="chapter_created_at_index"),
-            IndexModel([("is_processed", ASCENDING)], name="processed_index"),
+            # Collections allow one text index; chapter search is always within a novel,
+            # so novel_id is an equality prefix and title matches outrank content matches
+            IndexModel(
+                [("novel_id", ASCENDING), ("title", TEXT), ("content", TEXT)],
+                name="chapter_text_index",
+                weights={"title": 5, "content": 1}
+            ),
+            # Only unprocessed chapters are ever looked up by this flag, so index just those,
+            # oldest first, across all novels and per novel
+            IndexModel(
+                [("is_processed", ASCENDING), ("created_at", ASCENDING)],
+                name="unprocessed_by_time_index",
+                partialFilterExpression={"is_processed": False}
+            ),
+            IndexModel(
+                [("novel_id", ASCENDING), ("created_at", ASCENDING)],
+                name="unprocessed_by_novel_index",
+                partialFilterExpression={"is_processed": False}
+            ),
         ]
 
 
+class ChapterNumberView(BaseModel):
+    """Projection of a chapter down to its number, for cheap existence checks"""
+    chapter_number: int
+
+    class Settings:
+        # Excluding _id lets novel_chapter_index cover queries on novel_id and chapter_number
+        projection = {"_id": 0, "chapter_number": 1}
+
+
+class ChapterSummaryView(BaseModel):
+    """Projection of a chapter without its content, for chapter listings"""
+    id: PydanticObjectId = Field(alias="_id")
+    novel_id: str
+    title: str
+    chapter_number: int
+    summary: Optional[str] = None
+    analysis_data: Optional[Dict[str, Any]] = None
+    analysis_data_validated: bool = False
+    key_events: List[str] = []
+    characters_mentioned: List[str] = []
+    themes: List[str] = []
+    sentiment_score: Optional[float] = None
+    word_count: Optional[int] = None
+    reading_time_minutes: Optional[int] = None
+    is_processed: bool = False
+    processing_timestamp: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Settings:
+        projection = {"content": 0}
+
+
 class Character(Document):
     """Character document model for MongoDB"""
     
     # Basic Information
-    novel_id: Indexed(str)  # Changed to str to avoid ObjectId issues
-    name: Indexed(str)
+    novel_id: str  # Changed to str to avoid ObjectId issues; indexed via character_novel_name_index
+    name: str
     description: Optional[str] = None
     
     # Character Details
@@ -148,10 +221,15 @@ class Character(Document):
     class Settings:
         name = "characters"
         indexes = [
-            IndexModel([("novel_id", ASCENDING)], name="character_novel_id_index"),
+            # Also serves novel_id-only queries as its prefix
+            IndexModel([("novel_id", ASCENDING), ("name", ASCENDING)], name="character_novel_name_index"),
             IndexModel([("name", TEXT)], name="character_name_text_index"),
             IndexModel([("character_type", ASCENDING)], name="character_type_index"),
-            IndexModel([("mentions_count", ASCENDING)], name="mentions_count_index"),
+            # Top characters of a novel: equality on novel_id, then walk mentions in sort order
+            IndexModel(
+                [("novel_id", ASCENDING), ("mentions_count", DESCENDING)],
+                name="character_novel_mentions_index"
+            ),
         ]
 
 
@@ -169,7 +247,6 @@ class ChatHistory(Document):
     class Settings:
         name = "chat_history"
         indexes = [
-            IndexModel([("novel_id", ASCENDING)], name="chat_novel_id_index"),
             IndexModel([("created_at", ASCENDING)], name="chat_created_at_index"),
         ]
 
@@ -187,7 +264,6 @@ class Analysis(Document):
     class Settings:
         name = "analyses"
         indexes = [
-            IndexModel([("novel_id", ASCENDING)], name="analysis_novel_id_index"),
             IndexModel([("analysis_type", ASCENDING)], name="analysis_type_index"),
             IndexModel([("created_at", ASCENDING)], name="analysis_created_at_index"),
         ]
@@ -201,5 +277,8 @@ __all__ = [
     "ChatHistory",
     "Analysis",
     "RelatedSeries",
-    "ChaptersInfo"
+    "ChaptersInfo",
+    "NovelListItem",
+    "ChapterNumberView",
+    "ChapterSummaryView"
 ] 
\ No newline at end of file
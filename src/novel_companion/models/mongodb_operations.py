@@ -2,10 +2,30 @@
 MongoDB operations and example queries for Novel Companion AI
 """
 
+import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
+from beanie import PydanticObjectId, UpdateResponse
 
-from .mongodb_models import Novel, Chapter, Character, ChatHistory, Analysis
+from .mongodb_models import Novel, NovelListItem, Chapter, Character, ChatHistory, Analysis, ChapterNumberView, ChapterSummaryView
+from .mongodb_connection import invalidate_novel_cache, invalidate_chat_context
+
+
+def _stored_fields(model, data: dict) -> dict:
+    """Map field names to the (possibly aliased) keys they are stored under"""
+    fields = model.model_fields
+    return {
+        (fields[key].alias or key) if key in fields else key: value
+        for key, value in data.items()
+    }
+
+
+def _parse_id(document_id: str) -> Optional[PydanticObjectId]:
+    """Parse a document ID, or None if it is malformed"""
+    try:
+        return PydanticObjectId(document_id)
+    except Exception:
+        return None
 
 
 class NovelOperations:
@@ -20,39 +40,46 @@ class NovelOperations:
     @staticmethod
     async def update_novel(novel_id: str, update_data: dict) -> Optional[Novel]:
         """Update a novel"""
-        novel = await Novel.get(novel_id)
-        if novel:
-            for key, value in update_data.items():
-                setattr(novel, key, value)
-            novel.last_updated = datetime.utcnow()
-            await novel.save()
-            return novel
-        return None
+        novel_object_id = _parse_id(novel_id)
+        if novel_object_id is None:
+            return None
+        # One atomic $set instead of fetch, mutate and save, so concurrent counter updates survive
+        changes = _stored_fields(Novel, {**update_data, "last_updated": datetime.utcnow()})
+        novel = await Novel.find_one(Novel.id == novel_object_id).update(
+            {"$set": changes}, response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        invalidate_novel_cache(novel_id)
+        return novel
     
     @staticmethod
     async def delete_novel(novel_id: str) -> bool:
         """Delete a novel and all related data"""
-        try:
-            # Delete related chapters
-            await Chapter.find(Chapter.novel_id == novel_id).delete()
-            
-            # Delete related characters
-            await Character.find(Character.novel_id == novel_id).delete()
-            
-            # Delete related chat history
-            await ChatHistory.find(ChatHistory.novel_id == novel_id).delete()
-            
-            # Delete related analyses
-            await Analysis.find(Analysis.novel_id == novel_id).delete()
-            
-            # Delete the novel
-            novel = await Novel.get(novel_id)
-            if novel:
-                await novel.delete()
-                return True
+        novel_object_id = _parse_id(novel_id)
+        if novel_object_id is None:
             return False
-        except Exception:
+        
+        # The novel and its related data are independent deletes, so run them concurrently
+        labels = ("novel", "chapters", "characters", "chat history", "analyses")
+        results = await asyncio.gather(
+            Novel.find_one(Novel.id == novel_object_id).delete(),
+            Chapter.find(Chapter.novel_id == novel_id).delete(),
+            Character.find(Character.novel_id == novel_id).delete(),
+            ChatHistory.find(ChatHistory.novel_id == novel_id).delete(),
+            Analysis.find(Analysis.novel_id == novel_id).delete(),
+            return_exceptions=True
+        )
+        # After the writes, even partial ones, so a concurrent read can't re-cache the deleted novel
+        invalidate_novel_cache(novel_id)
+        
+        failed = False
+        for label, result in zip(labels, results, strict=True):
+            if isinstance(result, Exception):
+                print(f"❌ Failed to delete {label} for novel {novel_id}: {result}")
+                failed = True
+        if failed:
             return False
+        novel_result = results[0]
+        return novel_result is not None and novel_result.deleted_count > 0
     
     @staticmethod
     async def get_novels_by_genre(genre: str, limit: int = 20) -> List[Novel]:
@@ -68,11 +95,11 @@ class NovelOperations:
         ).to_list()
     
     @staticmethod
-    async def get_top_rated_novels(limit: int = 10) -> List[Novel]:
-        """Get top rated novels"""
+    async def get_top_rated_novels(limit: int = 10) -> List[NovelListItem]:
+        """Get top rated novels (listing fields only)"""
         return await Novel.find(
             Novel.average_rating != None
-        ).sort(-Novel.average_rating).limit(limit).to_list()
+        ).sort(-Novel.average_rating).limit(limit).project(NovelListItem).to_list()
     
     @staticmethod
     async def get_novels_by_year_range(start_year: int, end_year: int) -> List[Novel]:
@@ -95,7 +122,73 @@ class ChapterOperations:
     async def create_chapter(chapter_data: dict) -> Chapter:
         """Create a new chapter"""
         chapter = Chapter(**chapter_data)
-        return await chapter.insert()
+        chapter = await chapter.insert()
+        invalidate_chat_context(chapter.novel_id)
+        await ChapterOperations.increment_novel_counters(chapter.novel_id, 1, chapter.word_count or 0)
+        return chapter
+    
+    @staticmethod
+    async def create_chapters(chapters_data: List[dict]) -> List[Chapter]:
+        """Create many chapters with a single insert_many"""
+        chapters = [Chapter(**chapter_data) for chapter_data in chapters_data]
+        if not chapters:
+            return chapters
+        result = await Chapter.insert_many(chapters)
+        for chapter, chapter_id in zip(chapters, result.inserted_ids, strict=True):
+            chapter.id = chapter_id
+        
+        totals: Dict[str, List[int]] = {}
+        for chapter in chapters:
+            counts = totals.setdefault(chapter.novel_id, [0, 0])
+            counts[0] += 1
+            counts[1] += chapter.word_count or 0
+        for novel_id in totals:
+            invalidate_chat_context(novel_id)
+        await asyncio.gather(*(
+            ChapterOperations.increment_novel_counters(novel_id, count, words)
+            for novel_id, (count, words) in totals.items()
+        ))
+        return chapters
+    
+    @staticmethod
+    async def increment_novel_counters(novel_id: str, chapters: int, words: int) -> None:
+        """Atomically adjust a novel's denormalized chapter and word totals"""
+        novel_object_id = _parse_id(novel_id)
+        if novel_object_id is None:
+            return
+        # Totals that were never computed stay None; refresh_novel_counters fills them in
+        await Novel.get_motor_collection().update_one(
+            {"_id": novel_object_id, "chapter_count": {"$type": "number"}},
+            {"$inc": {"chapter_count": chapters, "total_word_count": words}}
+        )
+    
+    @staticmethod
+    async def refresh_novel_counters(novel_id: str) -> Dict[str, int]:
+        """Recompute a novel's chapter and word totals from its chapters (use after bulk writes)"""
+        novel_object_id = _parse_id(novel_id)
+        stats = await Chapter.aggregate([
+            {"$match": {"novel_id": novel_id}},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "total_words": {"$sum": "$word_count"}}}
+        ]).to_list(1)
+        counters = {
+            "chapter_count": stats[0]["count"] if stats else 0,
+            "total_word_count": stats[0]["total_words"] if stats else 0
+        }
+        if novel_object_id is not None:
+            await Novel.get_motor_collection().update_one(
+                {"_id": novel_object_id}, {"$set": counters}
+            )
+        return counters
+    
+    @staticmethod
+    async def reset_novel_counters(novel_id: str) -> None:
+        """Mark a novel's chapter and word totals as unknown so they are recomputed on next use"""
+        novel_object_id = _parse_id(novel_id)
+        if novel_object_id is None:
+            return
+        await Novel.get_motor_collection().update_one(
+            {"_id": novel_object_id}, {"$set": {"chapter_count": None, "total_word_count": None}}
+        )
     
     @staticmethod
     async def get_chapter_by_number(novel_id: str, chapter_number: int) -> Optional[Chapter]:
@@ -105,26 +198,61 @@ class ChapterOperations:
             Chapter.chapter_number == chapter_number
         )
     
+    @staticmethod
+    async def get_stored_numbers(novel_id: str, chapter_numbers: List[int]) -> Set[int]:
+        """Get which of the given chapter numbers are already stored, from the index alone"""
+        chapters = await Chapter.find({
+            "novel_id": novel_id,
+            "chapter_number": {"$in": chapter_numbers}
+        }).project(ChapterNumberView).to_list()
+        return {chapter.chapter_number for chapter in chapters}
+    
+    @staticmethod
+    async def get_processed_numbers(novel_id: str, chapter_numbers: List[int]) -> Set[int]:
+        """Get which of the given chapter numbers are already processed and analyzed"""
+        chapters = await Chapter.find({
+            "novel_id": novel_id,
+            "chapter_number": {"$in": chapter_numbers},
+            "is_processed": True,
+            "analysis_data": {"$nin": [None, {}]}
+        }).project(ChapterNumberView).to_list()
+        return {chapter.chapter_number for chapter in chapters}
+    
     @staticmethod
     async def update_chapter_analysis(chapter_id: str, analysis_data: dict) -> Optional[Chapter]:
         """Update chapter with analysis results"""
-        chapter = await Chapter.get(chapter_id)
-        if chapter:
-            for key, value in analysis_data.items():
-                setattr(chapter, key, value)
-            chapter.is_processed = True
-            chapter.processing_timestamp = datetime.utcnow()
-            chapter.updated_at = datetime.utcnow()
-            await chapter.save()
-            return chapter
-        return None
+        chapter_object_id = _parse_id(chapter_id)
+        if chapter_object_id is None:
+            return None
+        now = datetime.utcnow()
+        changes = {**analysis_data, "is_processed": True, "processing_timestamp": now, "updated_at": now}
+        if "analysis_data" in analysis_data and "analysis_data_validated" not in analysis_data:
+            # New analysis that the caller did not validate: readers must validate it
+            changes["analysis_data_validated"] = False
+        
+        # Single atomic $set; the previous version is returned so the word count delta is known
+        chapter = await Chapter.find_one(Chapter.id == chapter_object_id).update(
+            {"$set": _stored_fields(Chapter, changes)}, response_type=UpdateResponse.OLD_DOCUMENT
+        )
+        if chapter is None:
+            return None
+        previous_word_count = chapter.word_count or 0
+        for key, value in changes.items():
+            setattr(chapter, key, value)
+        
+        invalidate_chat_context(chapter.novel_id)
+        word_delta = (chapter.word_count or 0) - previous_word_count
+        if word_delta:
+            await ChapterOperations.increment_novel_counters(chapter.novel_id, 0, word_delta)
+        return chapter
     
     @staticmethod
-    async def get_unprocessed_chapters(limit: int = 100) -> List[Chapter]:
-        """Get chapters that haven't been processed yet"""
-        return await Chapter.find(
-            Chapter.is_processed == False
-        ).limit(limit).to_list()
+    async def get_unprocessed_chapters(limit: int = 100, novel_id: Optional[str] = None) -> List[Chapter]:
+        """Get chapters that haven't been processed yet, oldest first"""
+        query = Chapter.find(Chapter.is_processed == False)
+        if novel_id is not None:
+            query = query.find(Chapter.novel_id == novel_id)
+        return await query.sort("created_at").limit(limit).to_list()
     
     @staticmethod
     async def get_chapters_with_character(novel_id: str, character_name: str) -> List[Chapter]:
@@ -135,12 +263,12 @@ class ChapterOperations:
         ).to_list()
     
     @staticmethod
-    async def search_chapters_by_content(novel_id: str, search_term: str) -> List[Chapter]:
-        """Search chapters by content"""
+    async def search_chapters_by_content(novel_id: str, search_term: str) -> List[ChapterSummaryView]:
+        """Search a novel's chapter titles and content, best matches first"""
         return await Chapter.find(
             Chapter.novel_id == novel_id,
             {"$text": {"$search": search_term}}
-        ).to_list()
+        ).sort([("score", {"$meta": "textScore"})]).project(ChapterSummaryView).to_list()
 
 
 class CharacterOperations:
@@ -155,15 +283,18 @@ class CharacterOperations:
     @staticmethod
     async def update_character_mentions(character_id: str, chapter_number: int) -> Optional[Character]:
         """Update character mentions count and chapters appeared"""
-        character = await Character.get(character_id)
-        if character:
-            character.mentions_count += 1
-            if chapter_number not in character.chapters_appeared:
-                character.chapters_appeared.append(chapter_number)
-            character.updated_at = datetime.utcnow()
-            await character.save()
-            return character
-        return None
+        character_object_id = _parse_id(character_id)
+        if character_object_id is None:
+            return None
+        # Atomic, so concurrent mentions are never lost to a read-modify-write race
+        return await Character.find_one(Character.id == character_object_id).update(
+            {
+                "$inc": {"mentions_count": 1},
+                "$addToSet": {"chapters_appeared": chapter_number},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
     
     @staticmethod
     async def get_main_characters(novel_id: str) -> List[Character]:
@@ -188,35 +319,33 @@ class AnalyticsOperations:
     async def get_novel_statistics(novel_id: str) -> Dict[str, Any]:
         """Get comprehensive statistics for a novel"""
         try:
-            # Get novel
-            novel = await Novel.get(novel_id)
+            # Chapter totals come from the novel's counters; the character breakdown runs concurrently
+            character_pipeline = [
+                {"$match": {"novel_id": novel_id}},
+                {"$group": {"_id": "$character_type", "count": {"$sum": 1}}}
+            ]
+            novel, character_distribution = await asyncio.gather(
+                Novel.get(novel_id),
+                Character.aggregate(character_pipeline).to_list()
+            )
             if not novel:
                 return {}
             
-            # Count chapters
-            chapter_count = await Chapter.find(Chapter.novel_id == novel_id).count()
+            if novel.chapter_count is None:
+                # Novels stored before the counters existed get them computed once
+                counters = await ChapterOperations.refresh_novel_counters(novel_id)
+                chapter_count = counters["chapter_count"]
+                total_words = counters["total_word_count"]
+            else:
+                chapter_count = novel.chapter_count
+                total_words = novel.total_word_count or 0
             
-            # Count characters
-            character_count = await Character.find(Character.novel_id == novel_id).count()
-            
-            # Get total word count
-            pipeline = [
-                {"$match": {"novel_id": novel_id}},
-                {"$group": {"_id": None, "total_words": {"$sum": "$word_count"}}}
-            ]
-            word_count_result = await Chapter.aggregate(pipeline).to_list(1)
-            total_words = word_count_result[0]["total_words"] if word_count_result else 0
+            # Every character falls in exactly one type group
+            character_count = sum(item["count"] for item in character_distribution)
             
             # Get average chapter length
             avg_word_count = total_words / chapter_count if chapter_count > 0 else 0
             
-            # Get character type distribution
-            character_pipeline = [
-                {"$match": {"novel_id": novel_id}},
-                {"$group": {"_id": "$character_type", "count": {"$sum": 1}}}
-            ]
-            character_distribution = await Character.aggregate(character_pipeline).to_list()
-            
             return {
                 "novel_id": novel_id,
                 "title": novel.title,
@@ -266,12 +395,12 @@ class AnalyticsOperations:
             return []
     
     @staticmethod
-    async def get_recently_updated_novels(days: int = 7, limit: int = 10) -> List[Novel]:
-        """Get recently updated novels"""
+    async def get_recently_updated_novels(days: int = 7, limit: int = 10) -> List[NovelListItem]:
+        """Get recently updated novels (listing fields only)"""
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         return await Novel.find(
             Novel.last_updated >= cutoff_date
-        ).sort(-Novel.last_updated).limit(limit).to_list()
+        ).sort(-Novel.last_updated).limit(limit).project(NovelListItem).to_list()
 
 
 # Example usage and sample queries
@@ -56,6 +56,18 @@ class Novel(NovelBase):
         from_attributes = True
 
 
+class NovelSummary(BaseModel):
+    """Lightweight novel listing model (no content)"""
+    id: int
+    title: str
+    author: Optional[str] = None
+    status: NovelStatus
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class ChapterBase(BaseModel):
     """Base chapter model"""
     title: str = Field(..., min_length=1, max_length=200)
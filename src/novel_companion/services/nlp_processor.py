@@ -10,6 +10,20 @@ from collections import defaultdict, Counter
 
 from ..config import settings
 
+# Chapter heading patterns, tried in order until one produces a meaningful split
+CHAPTER_PATTERNS = tuple(
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r'\bChapter\s+(\d+|[IVXLCDM]+)\b',  # Chapter 1, Chapter I
+        r'\bCh\.\s+(\d+)\b',                # Ch. 1
+        r'^\s*(\d+)\s*$',                   # Just a number on its own line
+        r'\b(\d+)\.\s',                     # 1. at start of line
+    )
+)
+CAPITALIZED_WORD_RE = re.compile(r'\b[A-Z][a-z]+\b')
+SENTENCE_END_RE = re.compile(r'[.!?]+')
+WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+
 
 class NLPProcessor:
     """Natural Language Processing service for novel analysis"""
@@ -36,17 +50,9 @@ class NLPProcessor:
         """
         chapters = []
         
-        # Common chapter patterns
-        chapter_patterns = [
-            r'\bChapter\s+(\d+|[IVXLCDM]+)\b',  # Chapter 1, Chapter I
-            r'\bCh\.\s+(\d+)\b',                # Ch. 1
-            r'^\s*(\d+)\s*$',                   # Just a number on its own line
-            r'\b(\d+)\.\s',                     # 1. at start of line
-        ]
-        
         # Try each pattern
-        for pattern in chapter_patterns:
-            splits = re.split(pattern, content, flags=re.IGNORECASE | re.MULTILINE)
+        for pattern in CHAPTER_PATTERNS:
+            splits = pattern.split(content)
             if len(splits) > 3:  # Found meaningful splits
                 break
         else:
@@ -141,7 +147,7 @@ class NLPProcessor:
     def _basic_entity_extraction(self, text: str) -> Dict[str, List[str]]:
         """Basic entity extraction without spaCy"""
         # Simple capitalized word extraction for names
-        words = re.findall(r'\b[A-Z][a-z]+\b', text)
+        words = CAPITALIZED_WORD_RE.findall(text)
         
         # Filter common words and keep potential names
         common_words = {'The', 'This', 'That', 'There', 'Then', 'When', 'Where', 'What', 'Who', 'How', 'Why'}
@@ -230,7 +236,7 @@ class NLPProcessor:
             return [sent.text for sent in doc.sents]
         else:
             # Basic sentence splitting
-            sentences = re.split(r'[.!?]+', text)
+            sentences = SENTENCE_END_RE.split(text)
             return [s.strip() for s in sentences if s.strip()]
     
     def _infer_relationship_type(self, strength: int) -> str:
@@ -275,7 +281,7 @@ class NLPProcessor:
     def _basic_keyword_extraction(self, text: str) -> List[str]:
         """Basic keyword extraction without spaCy"""
         # Simple word frequency analysis
-        words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
+        words = WORD_RE.findall(text.lower())
         
         # Filter out common stop words
         stop_words = {